@@ -1,25 +1,982 @@
 # 重复图片校验
 import os
+import csv
 import hashlib
-from PIL import Image
+import io
+import json
+import multiprocessing
+import sqlite3
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from fnmatch import fnmatch
+from functools import partial
+import numpy as np
+from PIL import Image, ExifTags
 import imagehash
 
-def get_file_md5(file_path):
-    """计算文件MD5哈希值"""
+try:
+    # 可选依赖：安装 pillow-heif 后才能读取 HEIC/HEIF（iPhone 照片）
+    from pillow_heif import register_heif_opener
+    register_heif_opener()
+except ImportError:
+    register_heif_opener = None
+
+# 完整哈希时每次读取的块大小，内存占用与文件大小无关
+HASH_CHUNK_SIZE = 1024 * 1024
+# 部分哈希读取文件头、尾各多少字节
+PARTIAL_HASH_SIZE = 4 * 1024
+# 默认文件哈希算法，可选 hashlib 支持的任意算法（如 blake2b、sha256）
+HASH_ALGORITHM = "md5"
+# 默认扫描的图片扩展名（小写）
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp", ".bmp", ".tif", ".tiff", ".gif")
+if register_heif_opener is not None:
+    IMAGE_EXTENSIONS += (".heic", ".heif")
+# 多进程计算哈希的默认进程数
+HASH_WORKERS = os.cpu_count() or 1
+# 待计算的文件少于该数量时直接在当前线程计算（进程启动开销大于收益）
+POOL_MIN_FILES = 32
+# 每次派发给子进程的文件数，减少进程间通信次数
+POOL_CHUNK_SIZE = 16
+# 哈希缓存文件名（位于被扫描的文件夹中）
+HASH_CACHE_NAME = ".dedup_hash_cache.db"
+# 哈希缓存累计多少条新结果写一次库
+HASH_CACHE_FLUSH = 1000
+
+
+class HashCache:
+    """
+    哈希缓存（SQLite）：以 相对路径 + 文件大小 + 修改时间 为键，保存文件哈希、感知哈希等结果，
+    文件大小或修改时间变化即视为失效并重新计算；prune 清理已不存在的文件记录
+    打开时把记录全部读入内存，新结果批量写回
+    """
+
+    def __init__(self, db_path, root):
+        self.root = root
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS files ("
+                          "path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS hashes ("
+                          "path TEXT, kind TEXT, value TEXT, PRIMARY KEY (path, kind))")
+        self.entries = {}  # 相对路径 -> [大小, 修改时间, {哈希类型: 值}]
+        for path, size, mtime_ns in self.conn.execute("SELECT path, size, mtime_ns FROM files"):
+            self.entries[path] = [size, mtime_ns, {}]
+        for path, kind, value in self.conn.execute("SELECT path, kind, value FROM hashes"):
+            if path in self.entries:
+                self.entries[path][2][kind] = value
+        self.checked = set()  # 本次运行中已核对过大小与修改时间的文件
+        self.stale = {}  # 需重写文件信息（并清空旧哈希）的记录
+        self.pending = []  # 待写入的 (路径, 哈希类型, 值)
+        self.hits = 0
+        self.misses = 0
+
+    def _entry(self, path):
+        """取文件的缓存记录，本次运行首次访问时核对大小与修改时间，不一致则作废旧哈希"""
+        key = os.path.relpath(path, self.root)
+        if key not in self.checked:
+            self._check(key, os.stat(path))
+        return key, self.entries[key]
+
+    def _check(self, key, stat):
+        entry = self.entries.get(key)
+        if entry is None or entry[0] != stat.st_size or entry[1] != stat.st_mtime_ns:
+            entry = [stat.st_size, stat.st_mtime_ns, {}]
+            self.entries[key] = entry
+            self.stale[key] = entry
+        self.checked.add(key)
+
+    def check_stat(self, path, stat):
+        """
+        用扫描时已取得的 stat 结果（如 DirEntry.stat()）核对记录，之后访问不再重复 stat
+        每次调用都会重新核对，监视文件夹时文件在两轮之间被修改也能发现
+        """
+        self._check(os.path.relpath(path, self.root), stat)
+
+    def get(self, path, kind):
+        """取缓存的哈希值，没有或已失效时返回 None"""
+        _, entry = self._entry(path)
+        value = entry[2].get(kind)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def contains(self, path, kind):
+        """是否有有效的缓存值（不计入命中统计）"""
+        return kind in self._entry(path)[1][2]
+
+    def put(self, path, kind, value):
+        key, entry = self._entry(path)
+        entry[2][kind] = value
+        self.pending.append((key, kind, value))
+        if len(self.pending) >= HASH_CACHE_FLUSH:
+            self.flush()
+
+    def prune(self, paths):
+        """
+        删除已不存在的文件记录（文件已删除或移走），返回删除条数
+        paths 为本次扫描到的文件；不在其中的记录还要确认文件确实不在磁盘上，
+        按扩展名、通配符、大小过滤掉的文件仍保留缓存，换个过滤条件再扫描时继续可用
+        """
+        keep = {os.path.relpath(path, self.root) for path in paths}
+        removed = [key for key in self.entries
+                   if key not in keep and not os.path.lexists(os.path.join(self.root, key))]
+        with self.conn:
+            self.conn.executemany("DELETE FROM files WHERE path = ?", [(key,) for key in removed])
+            self.conn.executemany("DELETE FROM hashes WHERE path = ?", [(key,) for key in removed])
+        for key in removed:
+            del self.entries[key]
+        return len(removed)
+
+    def flush(self):
+        """把新结果写入数据库"""
+        with self.conn:
+            for key, (size, mtime_ns, _) in self.stale.items():
+                self.conn.execute("INSERT OR REPLACE INTO files (path, size, mtime_ns) VALUES (?, ?, ?)",
+                                  (key, size, mtime_ns))
+                self.conn.execute("DELETE FROM hashes WHERE path = ?", (key,))
+            self.conn.executemany("INSERT OR REPLACE INTO hashes (path, kind, value) VALUES (?, ?, ?)",
+                                  self.pending)
+        self.stale = {}
+        self.pending = []
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+
+def _user_cache_dir():
+    """用户缓存目录（Windows 为 %LOCALAPPDATA%\\python_ui，其它系统为 ~/.cache/python_ui）"""
+    base = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "python_ui")
+
+
+def open_hash_cache(folder):
+    """
+    打开文件夹的哈希缓存：优先放在该文件夹中（随文件夹移动仍有效），
+    文件夹不可写时放到用户缓存目录
+    """
+    try:
+        return HashCache(os.path.join(folder, HASH_CACHE_NAME), folder)
+    except sqlite3.Error:
+        cache_dir = _user_cache_dir()
+        os.makedirs(cache_dir, exist_ok=True)
+        name = hashlib.md5(os.path.abspath(folder).encode("utf-8")).hexdigest()
+        return HashCache(os.path.join(cache_dir, f"dedup_{name}.db"), folder)
+
+
+def get_file_md5(file_path, algorithm=HASH_ALGORITHM, chunk_size=HASH_CHUNK_SIZE, cache=None):
+    """计算文件哈希值（默认MD5），分块流式读取；传入 cache 时优先使用缓存结果"""
+    if cache is not None:
+        cached = cache.get(file_path, algorithm)
+        if cached is not None:
+            return cached
+    digest = hashlib.new(algorithm)
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    value = digest.hexdigest()
+    if cache is not None:
+        cache.put(file_path, algorithm, value)
+    return value
+
+
+def get_partial_hash(file_path, file_size, algorithm=HASH_ALGORITHM, block_size=PARTIAL_HASH_SIZE):
+    """
+    只读取文件头、尾各 block_size 字节计算哈希，用于快速排除大小相同但内容不同的文件
+    文件不超过 2*block_size 时读取的就是全部内容，结果等价于完整哈希
+    """
+    digest = hashlib.new(algorithm)
     with open(file_path, 'rb') as f:
-        return hashlib.md5(f.read()).hexdigest()
+        if file_size <= 2 * block_size:
+            digest.update(f.read())
+        else:
+            digest.update(f.read(block_size))
+            f.seek(-block_size, os.SEEK_END)
+            digest.update(f.read(block_size))
+    return digest.hexdigest()
+
+
+def _group_by(paths, key_func):
+    """按 key_func(path) 分组，只保留有两个及以上文件的组；读取失败的文件跳过"""
+    groups = {}
+    for path in paths:
+        try:
+            key = key_func(path)
+        except OSError:
+            continue
+        groups.setdefault(key, []).append(path)
+    return [group for group in groups.values() if len(group) > 1]
+
+
+def create_hash_pool(workers=HASH_WORKERS):
+    """
+    创建计算哈希的进程池，workers<=1 时返回 None（在当前线程计算）
+    统一使用 spawn 启动子进程：避免在多线程的 GUI 进程中 fork，与 Windows 行为一致
+    """
+    if not workers or workers <= 1:
+        return None
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def _pool_map(executor, func, items):
+    """有进程池且文件足够多时在子进程中按顺序批量计算，否则在当前线程逐个计算"""
+    if executor is None or len(items) < POOL_MIN_FILES:
+        return map(func, items)
+    return executor.map(func, items, chunksize=POOL_CHUNK_SIZE)
+
+
+def _file_hash_job(path, algorithm=HASH_ALGORITHM):
+    """子进程：计算文件完整哈希，读取失败返回 None"""
+    try:
+        return get_file_md5(path, algorithm)
+    except OSError:
+        return None
+
+
+def compute_file_hashes(paths, algorithm=HASH_ALGORITHM, cache=None, executor=None):
+    """
+    批量计算文件完整哈希，已缓存的直接取缓存，其余交给进程池
+    :return: {路径: 哈希值}，读取失败的文件不在结果中
+    """
+    hashes = {}
+    todo = []
+    for path in paths:
+        try:
+            cached = cache.get(path, algorithm) if cache is not None else None
+        except OSError:
+            continue
+        if cached is None:
+            todo.append(path)
+        else:
+            hashes[path] = cached
+    for path, value in zip(todo, _pool_map(executor, partial(_file_hash_job, algorithm=algorithm), todo)):
+        if value is not None:
+            hashes[path] = value
+            if cache is not None:
+                cache.put(path, algorithm, value)
+    return hashes
+
 
-def get_image_phash(file_path):
-    """计算感知哈希值"""
+def find_exact_duplicates(paths, algorithm=HASH_ALGORITHM, cache=None, executor=None, sizes=None):
+    """
+    查找内容完全相同的文件，逐级缩小需要读取的范围：
+    1. 按文件大小分组，大小唯一的文件不可能重复，不读取内容
+    2. 大小相同的文件比较头尾部分哈希（组内都已缓存完整哈希时直接比较缓存）
+    3. 部分哈希仍相同的文件才分块计算完整哈希（有进程池时并行计算）
+    :param paths: 文件路径列表（顺序即保留优先级）
+    :param cache: HashCache，完整哈希的缓存
+    :param executor: create_hash_pool 创建的进程池，None 表示在当前线程计算
+    :param sizes: 已知的 {路径: 文件大小}（如扫描时 DirEntry 缓存的结果），缺少的才 stat
+    :return: {重复文件路径: 与之相同且最先出现的文件路径}
+    """
+    order = {path: i for i, path in enumerate(paths)}
+    sizes = dict(sizes or {})
+
+    def size_of(path):
+        if path not in sizes:
+            sizes[path] = os.path.getsize(path)
+        return sizes[path]
+
+    same_content = []
+    need_full = []  # 需要完整哈希才能确定的候选组
+    for same_size in _group_by(paths, size_of):
+        size = sizes[same_size[0]]
+        if cache is not None and all(cache.contains(p, algorithm) for p in same_size):
+            need_full.append(same_size)
+            continue
+        for same_partial in _group_by(same_size, lambda p: get_partial_hash(p, size, algorithm)):
+            if size <= 2 * PARTIAL_HASH_SIZE:
+                same_content.append(same_partial)  # 部分哈希已覆盖全部内容
+            else:
+                need_full.append(same_partial)
+
+    full_hashes = compute_file_hashes([p for group in need_full for p in group], algorithm, cache, executor)
+    for group in need_full:
+        same_content += _group_by([p for p in group if p in full_hashes], full_hashes.get)
+
+    duplicates = {}
+    for group in same_content:
+        group.sort(key=order.get)
+        for path in group[1:]:
+            duplicates[path] = group[0]
+    return duplicates
+
+# 可选的图片哈希算法：名称 -> imagehash 函数
+HASH_ALGORITHMS = {
+    "ahash": imagehash.average_hash,  # 均值哈希：最快，对亮度、对比度变化敏感
+    "dhash": imagehash.dhash,  # 差值哈希：很快，适合作为级联初筛
+    "phash": imagehash.phash,  # 感知哈希（DCT）：默认，对缩放、压缩稳定
+    "whash": imagehash.whash,  # 小波哈希：与感知哈希相近，计算稍慢
+    "colorhash": imagehash.colorhash,  # 颜色哈希：比较色彩分布，可发现构图不同但色调相同的图片
+}
+DEFAULT_HASH_ALGORITHM = "phash"
+# 哈希边长，位数为其平方；colorhash 中为每个颜色区间的位数
+DEFAULT_HASH_SIZE = 8
+HASH_SIZES = (8, 16)
+# 级联模式：先用最便宜的 dHash 初筛（阈值放宽），只有初筛命中的候选图片才计算所选哈希复核
+CASCADE_PREFILTER = "dhash"
+CASCADE_DISTANCE = 12  # 默认阈值对应的初筛阈值，阈值调高时按比例放宽
+# 初筛阈值的上限：64 位 dHash 距离达到一半时无关图片也大量命中，初筛失去意义
+CASCADE_MAX_DISTANCE = 32
+
+
+def hash_bits(algorithm, hash_size=DEFAULT_HASH_SIZE):
+    """哈希的位数"""
+    if algorithm == "colorhash":
+        return 14 * hash_size  # colorhash 共 14 个颜色区间
+    return hash_size * hash_size
+
+
+# 感知哈希只需要 32×32 的灰度图：JPEG 按 DCT 缩放解码到不小于该边长即可，远大于哈希输入；
+# 与完整解码相比，少数图片的哈希会相差 1~2 位（缩放前的重采样不同），因此缓存类别单独区分
+PHASH_DECODE_SIZE = 256
+# 缩小解码哈希在缓存中的类别后缀（见 hash_kind）
+REDUCED_DECODE_SUFFIX = "_r"
+
+
+def hash_kind(algorithm, hash_size=DEFAULT_HASH_SIZE):
+    """
+    哈希在缓存中的类别名：算法名 + 尺寸（默认尺寸省略）+ REDUCED_DECODE_SUFFIX
+    缩小解码算出的哈希与完整解码的不完全相同，加后缀与旧版本缓存的完整解码结果区分，不混用
+    """
+    kind = algorithm if hash_size == DEFAULT_HASH_SIZE else f"{algorithm}{hash_size}"
+    return kind + REDUCED_DECODE_SUFFIX
+
+
+# EXIF 缩略图短边不小于该值才使用（过小的缩略图细节不足）
+THUMBNAIL_MIN_SIZE = 96
+# EXIF 缩略图宽高比与原图相差不超过该比例才使用（带黑边或未随编辑更新的缩略图会被跳过）
+THUMBNAIL_ASPECT_TOLERANCE = 0.01
+# EXIF IFD1 中缩略图的偏移和长度标签
+_THUMBNAIL_OFFSET_TAG = 0x0201
+_THUMBNAIL_LENGTH_TAG = 0x0202
+
+
+def _match_any(patterns, *names):
+    """任意一个名称匹配任意一个通配符"""
+    return any(fnmatch(name, pattern) for pattern in patterns for name in names)
+
+
+def scan_files(root, extensions=IMAGE_EXTENSIONS, include=None, exclude=None, min_size=0, max_size=None):
+    """
+    用 os.scandir 流式遍历文件夹（含子文件夹），边遍历边产出符合条件的文件，顺序与 os.walk 相同
+    DirEntry 自带文件类型，stat() 结果会被缓存，后续取大小、修改时间无需再次访问磁盘（网络盘上收益明显）
+    :param extensions: 扩展名元组（小写，含点），None 表示不限
+    :param include: 文件名通配符列表（如 ["IMG_*"]），匹配任意一个才保留，None 表示不限
+    :param exclude: 通配符列表，文件名或相对路径匹配任意一个即跳过，匹配的文件夹整个跳过
+    :param min_size: 最小文件大小（字节）
+    :param max_size: 最大文件大小（字节），None 表示不限
+    :return: 生成器，产出 os.DirEntry
+    """
+    stack = [root]
+    while stack:
+        folder = stack.pop()
+        try:
+            with os.scandir(folder) as it:
+                entries = list(it)
+        except OSError:
+            continue  # 无权限或已被删除的文件夹跳过（与 os.walk 一致）
+        subdirs = []
+        for entry in entries:
+            if exclude and _match_any(exclude, entry.name, os.path.relpath(entry.path, root)):
+                continue
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                    continue
+                if not entry.is_file():
+                    continue
+                if extensions and not entry.name.lower().endswith(tuple(extensions)):
+                    continue
+                if include and not _match_any(include, entry.name):
+                    continue
+                if min_size or max_size is not None:
+                    size = entry.stat().st_size
+                    if size < min_size or (max_size is not None and size > max_size):
+                        continue
+            except OSError:
+                continue  # 遍历期间文件被删除
+            yield entry
+        # 子文件夹按列出顺序先序遍历
+        stack.extend(reversed(subdirs))
+
+
+def _exif_thumbnail(img):
+    """读取 JPEG 内嵌的 EXIF 缩略图，尺寸足够且宽高比与原图一致时返回，否则返回 None"""
+    exif_data = img.info.get("exif")
+    if not exif_data:
+        return None
+    try:
+        ifd1 = img.getexif().get_ifd(ExifTags.IFD.IFD1)
+        offset = ifd1.get(_THUMBNAIL_OFFSET_TAG)
+        length = ifd1.get(_THUMBNAIL_LENGTH_TAG)
+        if not offset or not length:
+            return None
+        # 偏移相对 TIFF 头，原始数据以 "Exif\0\0" 开头
+        start = 6 if exif_data.startswith(b"Exif") else 0
+        thumb = Image.open(io.BytesIO(exif_data[start + offset:start + offset + length]))
+        thumb.load()
+    except Exception:
+        return None  # 缩略图损坏时回退到解码原图
+    width, height = img.size
+    if min(thumb.size) < THUMBNAIL_MIN_SIZE:
+        return None
+    if abs(thumb.width / thumb.height - width / height) > THUMBNAIL_ASPECT_TOLERANCE * width / height:
+        return None
+    return thumb
+
+
+def _reduced_image(img, mode="L"):
+    """
+    为计算哈希准备缩小的图像，避免完整解码大图：
+    1. JPEG 有合适的 EXIF 缩略图时直接使用
+    2. 否则用 draft() 让 JPEG 解码器按 DCT 缩放（最多 1/8）直接输出小尺寸图像
+    其它格式原样返回
+    :param mode: 解码模式，灰度哈希用 "L"，colorhash 需要 "RGB"
+    """
+    if img.format != "JPEG":
+        return img
+    thumb = _exif_thumbnail(img)
+    if thumb is not None:
+        return thumb
+    img.draft(mode, (PHASH_DECODE_SIZE, PHASH_DECODE_SIZE))
+    return img
+
+
+def get_image_hash(file_path, algorithm=DEFAULT_HASH_ALGORITHM, hash_size=DEFAULT_HASH_SIZE, cache=None):
+    """
+    计算图片哈希（JPEG 缩小解码）；传入 cache 时优先使用缓存结果
+    :param algorithm: HASH_ALGORITHMS 中的算法名
+    :param hash_size: 哈希边长（colorhash 为每个颜色区间的位数）
+    """
+    kind = hash_kind(algorithm, hash_size)
+    if cache is not None:
+        cached = cache.get(file_path, kind)
+        if cached is not None:
+            if algorithm == "colorhash":
+                return imagehash.hex_to_flathash(cached, hash_size)
+            return imagehash.hex_to_hash(cached)
     with Image.open(file_path) as img:
-        return imagehash.phash(img)
+        img = _reduced_image(img, "RGB" if algorithm == "colorhash" else "L")
+        image_hash = HASH_ALGORITHMS[algorithm](img, hash_size)
+    if cache is not None:
+        cache.put(file_path, kind, str(image_hash))
+    return image_hash
+
+
+def get_image_phash(file_path, cache=None):
+    """计算感知哈希值（JPEG 缩小解码）；传入 cache 时优先使用缓存结果"""
+    return get_image_hash(file_path, "phash", DEFAULT_HASH_SIZE, cache)
+
+
+def _hash_job(path, algorithm=DEFAULT_HASH_ALGORITHM, hash_size=DEFAULT_HASH_SIZE):
+    """子进程：解码图片并计算哈希，只返回紧凑结果 (十六进制哈希, 错误信息)"""
+    try:
+        return str(get_image_hash(path, algorithm, hash_size)), None
+    except Exception as e:
+        return None, str(e)
+
+
+def compute_hashes(paths, algorithm=DEFAULT_HASH_ALGORITHM, hash_size=DEFAULT_HASH_SIZE, cache=None, executor=None):
+    """
+    批量计算图片哈希：已缓存的直接取缓存，其余逐个提交给进程池并行解码计算
+    paths 可以是边遍历边产出的生成器（见 scan_files），子进程在遍历结束前就开始计算
+    结果严格按 paths 的顺序产出，调用方可逐张比对，保持先出现者保留的规则
+    :return: 生成器，产出 (路径, 整数哈希或 None, 错误信息或 None)
+    """
+    kind = hash_kind(algorithm, hash_size)
+    job = partial(_hash_job, algorithm=algorithm, hash_size=hash_size)
+    window = deque()  # 按输入顺序等待产出的 [路径, 缓存的十六进制哈希, Future]
+    todo = 0  # 需要计算的文件数，达到 POOL_MIN_FILES 才启用进程池
+    use_pool = False
+
+    def ready(item):
+        return item[1] is not None or executor is None or (item[2] is not None and item[2].done())
+
+    def finish(item):
+        path, value, future = item
+        if value is not None:
+            return path, int(value, 16), None
+        value, error = future.result() if future is not None else job(path)
+        if value is None:
+            return path, None, error
+        if cache is not None:
+            cache.put(path, kind, value)
+        return path, int(value, 16), None
+
+    for path in paths:
+        try:
+            cached = cache.get(path, kind) if cache is not None else None
+        except OSError:
+            cached = None  # 文件读取失败，交给计算时报告错误
+        item = [path, cached, None]
+        window.append(item)
+        if cached is None and executor is not None:
+            todo += 1
+            if use_pool:
+                item[2] = executor.submit(job, path)
+            elif todo >= POOL_MIN_FILES:
+                use_pool = True
+                for waiting in window:
+                    if waiting[1] is None:
+                        waiting[2] = executor.submit(job, waiting[0])
+        while window and ready(window[0]):
+            yield finish(window.popleft())
+    while window:
+        yield finish(window.popleft())
+
+
+# 感知哈希汉明距离不超过该值视为相似图片
+SIMILAR_DISTANCE = 4
+
+
+def default_distance(algorithm=DEFAULT_HASH_ALGORITHM, hash_size=DEFAULT_HASH_SIZE):
+    """未指定阈值时按哈希位数等比例放大 SIMILAR_DISTANCE（64 位哈希即为 SIMILAR_DISTANCE）"""
+    return max(1, round(SIMILAR_DISTANCE * hash_bits(algorithm, hash_size) / 64))
+
+
+def cascade_distance(algorithm=DEFAULT_HASH_ALGORITHM, hash_size=DEFAULT_HASH_SIZE, threshold=None):
+    """
+    级联初筛使用的 dHash 阈值：按用户阈值相对默认阈值的比例放大 CASCADE_DISTANCE
+    :return: 初筛阈值；超过 CASCADE_MAX_DISTANCE 时返回 None，表示该阈值下不宜级联
+    """
+    default = default_distance(algorithm, hash_size)
+    if threshold is None or threshold <= default:
+        return CASCADE_DISTANCE
+    distance = -(-CASCADE_DISTANCE * threshold // default)  # 向上取整
+    return distance if distance < CASCADE_MAX_DISTANCE else None
+
+
+def hash_to_int(image_hash):
+    """把 imagehash 的哈希值转为整数，两个整数异或后的 1 的个数即汉明距离"""
+    return int(str(image_hash), 16)
+
+
+def popcount(value):
+    """整数二进制中 1 的个数"""
+    return bin(value).count("1")
+
+
+if hasattr(int, "bit_count"):
+    popcount = int.bit_count  # Python 3.10+ 内置实现更快
+
+
+class HammingIndex:
+    """
+    汉明空间近邻索引（多索引哈希）：把 bits 位整数哈希切成 max_distance+1 段，
+    由鸽巢原理，汉明距离不超过 max_distance 的两个哈希至少有一段完全相同，
+    所以查询时只需与各段命中的候选比较，不必与所有已有哈希逐个计算距离
+    阈值越小分段越长、候选越少；阈值接近位数一半时退化为接近逐个比较
+    阈值不小于位数时分段无法保证鸽巢原理成立，改为与所有已有哈希逐个比较
+    """
+
+    def __init__(self, max_distance=SIMILAR_DISTANCE, bits=64):
+        self.max_distance = max_distance
+        self.linear = max_distance >= bits
+        chunks = 1 if self.linear else max(1, max_distance + 1)
+        bounds = [bits * i // chunks for i in range(chunks + 1)]
+        # 每段的 (右移位数, 掩码)
+        self.chunks = [(bounds[i], (1 << (bounds[i + 1] - bounds[i])) - 1) for i in range(chunks)]
+        self.tables = [{} for _ in self.chunks]  # 段值 -> [加入序号]
+        self.hashes = []
+        self.values = []
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def add(self, hash_value, value):
+        """加入一个整数哈希及其关联值（如文件路径）"""
+        seq = len(self.hashes)
+        self.hashes.append(hash_value)
+        self.values.append(value)
+        for table, (shift, mask) in zip(self.tables, self.chunks):
+            table.setdefault((hash_value >> shift) & mask, []).append(seq)
+
+    def query(self, hash_value, max_distance=None):
+        """
+        查询距离不超过 max_distance（默认且最大为建索引时的阈值）的所有已有哈希
+        :return: [(汉明距离, 关联值)]，按加入顺序排列
+        """
+        limit = self.max_distance if max_distance is None else min(max_distance, self.max_distance)
+        if self.linear:
+            matches = [(seq, popcount(hash_value ^ other)) for seq, other in enumerate(self.hashes)]
+            return [(distance, self.values[seq]) for seq, distance in matches if distance <= limit]
+        seen = set()
+        matches = []
+        for table, (shift, mask) in zip(self.tables, self.chunks):
+            for seq in table.get((hash_value >> shift) & mask, ()):
+                if seq in seen:
+                    continue
+                seen.add(seq)
+                distance = popcount(hash_value ^ self.hashes[seq])
+                if distance <= limit:
+                    matches.append((seq, distance))
+        matches.sort()
+        return [(distance, self.values[seq]) for seq, distance in matches]
+
+    def find(self, hash_value):
+        """返回最早加入的相似哈希的关联值，没有则返回 None（与逐个比较时先命中先返回一致）"""
+        matches = self.query(hash_value)
+        return matches[0][1] if matches else None
+
+
+# 批量比对时每块的最大元素数（块行数 x 列数），2MB 的 uint64 异或结果可留在 CPU 缓存中
+BLOCK_ELEMENTS = 256 * 1024
+
+# 每个字节中 1 的个数（旧版 numpy 没有 bitwise_count 时使用）
+_BYTE_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def _popcount64(values):
+    """uint64 数组逐元素统计 1 的个数"""
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(values)
+    return _BYTE_POPCOUNT[values.view(np.uint8)].reshape(values.shape + (8,)).sum(axis=-1, dtype=np.uint8)
+
+
+def _hash_words(hashes, bits=64):
+    """整数哈希转为 (数量, 字数) 的 uint64 数组，超过 64 位的哈希按低位在前拆成多列"""
+    words = max(1, (bits + 63) // 64)
+    if words == 1:
+        return np.asarray(hashes, dtype=np.uint64).reshape(-1, 1)
+    mask = (1 << 64) - 1
+    return np.array([[(h >> (64 * k)) & mask for k in range(words)] for h in hashes],
+                    dtype=np.uint64).reshape(-1, words)
+
+
+def iter_similar_pairs(hashes, max_distance=SIMILAR_DISTANCE, block_elements=BLOCK_ELEMENTS, bits=64):
+    """
+    向量化批量比对：把整数哈希装入 uint64 数组，分块做异或 + popcount，
+    按块产出汉明距离不超过 max_distance 的所有图片对（只比较 i < j）
+    :param hashes: 整数哈希列表（见 hash_to_int）或 uint64 数组
+    :param bits: 哈希位数，超过 64 位时每个哈希占多个 uint64
+    :return: 生成器，每块产出 (i 数组, j 数组, 距离数组)，i 按升序排列
+    """
+    values = _hash_words(hashes, bits)
+    count, words = values.shape
+    rows = max(1, block_elements // max(count * words, 1))
+    for start in range(0, count, rows):
+        stop = min(count, start + rows)
+        # 每行只与自身及其后的哈希比较（上三角）
+        xor = values[start:stop, None] ^ values[None, start:]
+        if words == 1:
+            distances = _popcount64(xor[..., 0])
+        else:
+            distances = _popcount64(xor).sum(axis=-1, dtype=np.uint16)
+        row_idx, col_idx = np.nonzero(distances <= max_distance)
+        upper = col_idx > row_idx
+        row_idx, col_idx = row_idx[upper], col_idx[upper]
+        yield row_idx + start, col_idx + start, distances[row_idx, col_idx]
+
+
+def _assign_owners(count, pair_blocks):
+    """
+    按先出现者保留的规则由相似对得到每张图片的归属
+    :param pair_blocks: 可迭代的 (i 数组, j 数组)，i < j，且后一块的 i 都大于前一块
+    :return: owners 数组，owners[i] 为第 i 张所属保留图片的序号，等于 i 表示第 i 张被保留
+    """
+    owners = np.full(count, -1, dtype=np.int64)
+    for row_idx, col_idx in pair_blocks:
+        rows, starts = np.unique(row_idx, return_index=True)
+        ends = np.append(starts[1:], len(row_idx))
+        for i, a, b in zip(rows.tolist(), starts.tolist(), ends.tolist()):
+            if owners[i] != -1:
+                continue  # 已是前面某张的重复，不再吸收其它图片
+            owners[i] = i
+            similar = col_idx[a:b]
+            owners[similar[owners[similar] == -1]] = i
+    # 没有任何相似对的图片保留自身
+    unassigned = owners == -1
+    owners[unassigned] = np.nonzero(unassigned)[0]
+    return owners
+
+
+def find_similar_groups(hashes, max_distance=SIMILAR_DISTANCE, block_elements=BLOCK_ELEMENTS, bits=64):
+    """
+    一次性找出所有相似图片的归属：按顺序逐张判断，与已保留的某张距离不超过阈值即视为其重复，
+    结果与逐张流式比对（先出现者保留）完全一致
+    :param hashes: 整数哈希列表（见 hash_to_int）
+    :param bits: 哈希位数
+    :return: owners 数组，owners[i] 为第 i 张所属保留图片的序号，等于 i 表示第 i 张被保留
+    """
+    pairs = ((i, j) for i, j, _ in iter_similar_pairs(hashes, max_distance, block_elements, bits))
+    return _assign_owners(len(hashes), pairs)
+
+
+def find_candidate_pairs(hashes, max_distance=CASCADE_DISTANCE, bits=64, block_elements=BLOCK_ELEMENTS):
+    """
+    级联第一步：用便宜的哈希初筛出所有距离不超过 max_distance 的候选图片对
+    :return: (i 数组, j 数组)，i < j 且 i 升序
+    """
+    blocks = [(i, j) for i, j, _ in iter_similar_pairs(hashes, max_distance, block_elements, bits)]
+    if not blocks:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    return np.concatenate([i for i, _ in blocks]), np.concatenate([j for _, j in blocks])
+
+
+def confirm_candidate_pairs(rows, cols, hashes, max_distance=SIMILAR_DISTANCE):
+    """
+    级联第二步：候选对用所选哈希复核，距离不超过 max_distance 才算相似
+    :param hashes: {序号: 整数哈希}，只需包含候选对涉及的图片，缺失（计算失败）的视为不相似
+    :return: 通过复核的 [(i, j)]
+    """
+    return [(i, j) for i, j in zip(rows.tolist(), cols.tolist())
+            if i in hashes and j in hashes and popcount(hashes[i] ^ hashes[j]) <= max_distance]
+
+
+class DisjointSet:
+    """并查集：把两两匹配关系合并为重复组（a≈b、b≈c 时 a、b、c 同组）"""
+
+    def __init__(self):
+        self.parent = {}
+
+    def find(self, item):
+        """返回所在组的代表元素（路径减半压缩）"""
+        self.parent.setdefault(item, item)
+        while self.parent[item] != item:
+            self.parent[item] = self.parent[self.parent[item]]
+            item = self.parent[item]
+        return item
+
+    def union(self, a, b):
+        """合并 a、b 所在的组"""
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            self.parent[root_b] = root_a
+
+
+# 每组保留哪一张：最高分辨率 / 最大文件 / 最早修改；条件相同时保留扫描顺序靠前的
+KEEPER_RULES = ("resolution", "size", "oldest")
+DEFAULT_KEEPER_RULE = "resolution"
+# 去重报告的格式
+REPORT_FORMATS = ("csv", "json")
+REPORT_FIELDS = ["group", "role", "match", "path", "keeper", "width", "height", "size", "mtime"]
+
+
+def _image_info(path):
+    """读取文件大小、修改时间和图片分辨率（只解析文件头，不解码像素），读取失败的项为 0"""
+    try:
+        stat = os.stat(path)
+        size, mtime = stat.st_size, stat.st_mtime
+    except OSError:
+        size, mtime = 0, 0
+    try:
+        with Image.open(path) as img:
+            width, height = img.size
+    except Exception:
+        width, height = 0, 0
+    return {"path": path, "width": width, "height": height, "size": size, "mtime": mtime}
+
+
+def _keeper_key(info, rule):
+    """保留规则的排序键，越小越优先"""
+    if rule == "size":
+        return -info["size"]
+    if rule == "oldest":
+        return info["mtime"]
+    return -(info["width"] * info["height"])
+
+
+def build_duplicate_groups(paths, pairs, exact=None, rule=DEFAULT_KEEPER_RULE):
+    """
+    用并查集把匹配对合并为重复组，并按规则为每组选出保留的图片
+    :param paths: 全部图片路径（扫描顺序，用于组排序和规则相同时的取舍）
+    :param pairs: 匹配的 (路径, 路径) 对，包括完全重复和相似
+    :param exact: find_exact_duplicates 的结果，用于区分组内成员与保留图片是完全重复还是相似
+    :param rule: KEEPER_RULES 之一
+    :return: [{"group": 组号, "keeper": 保留路径, "members": [成员信息...]}]，成员信息见 REPORT_FIELDS
+    """
+    exact = exact or {}
+    order = {path: i for i, path in enumerate(paths)}
+    groups = DisjointSet()
+    for a, b in pairs:
+        groups.union(a, b)
+    members = {}
+    for path in sorted(groups.parent, key=order.get):
+        members.setdefault(groups.find(path), []).append(path)
+
+    result = []
+    for group_paths in members.values():
+        if len(group_paths) < 2:
+            continue
+        infos = [_image_info(path) for path in group_paths]
+        keeper = min(infos, key=lambda info: (_keeper_key(info, rule), order[info["path"]]))["path"]
+        group_id = len(result) + 1
+        for info in infos:
+            path = info["path"]
+            info["group"] = group_id
+            info["role"] = "keep" if path == keeper else "duplicate"
+            if path == keeper:
+                info["match"] = ""
+            else:
+                info["match"] = "exact" if exact.get(path, path) == exact.get(keeper, keeper) else "similar"
+            info["keeper"] = keeper
+            info["mtime"] = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(info["mtime"]))
+        result.append({"group": group_id, "keeper": keeper, "members": infos})
+    return result
+
+
+def write_report(groups, report_path):
+    """把重复组写成 CSV（每行一个成员）或 JSON（按组嵌套）报告，格式由扩展名决定"""
+    if report_path.lower().endswith(".json"):
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(groups, f, ensure_ascii=False, indent=2)
+        return
+    # utf-8-sig：Excel 打开中文路径不乱码
+    with open(report_path, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=REPORT_FIELDS)
+        writer.writeheader()
+        for group in groups:
+            writer.writerows(group["members"])
+
+
+def delete_duplicates(groups):
+    """分析完成后统一删除各组中未保留的图片，返回成功删除的个数"""
+    deleted = 0
+    for group in groups:
+        for member in group["members"]:
+            if member["role"] == "duplicate" and del_file(member["path"]):
+                deleted = deleted + 1
+    return deleted
+
+
+# 监视文件夹模式默认每隔多少秒扫描一次
+WATCH_INTERVAL = 10
+
+
+class DedupIndex:
+    """
+    增量去重索引（监视文件夹模式）：常驻内存保存已处理文件的大小/修改时间、完整哈希和相似哈希索引，
+    首轮由整体去重的结果建立（seed，按保留规则选出每组保留的图片），
+    之后每轮只对新增或修改过的文件计算哈希并与索引比对，已在索引中的保留，新来的重复图片被标记
+    """
+
+    def __init__(self, algorithm=DEFAULT_HASH_ALGORITHM, hash_size=DEFAULT_HASH_SIZE, max_distance=None, cache=None):
+        self.algorithm = algorithm
+        self.hash_size = hash_size
+        self.max_distance = default_distance(algorithm, hash_size) if max_distance is None else max_distance
+        self.cache = cache
+        self.files = {}  # 已处理的文件：路径 -> (大小, 修改时间)
+        self.by_size = {}  # 保留的文件按大小分组，完全重复只需与同大小的比较
+        self.digests = {}  # 按需计算的完整哈希
+        self.hashes = {}  # 保留图片的相似哈希（按加入顺序）
+        self.index = HammingIndex(self.max_distance, hash_bits(algorithm, hash_size))
+
+    def __len__(self):
+        return len(self.files)
+
+    def diff(self, entries):
+        """
+        与上一轮比较，移除已消失或被修改的文件
+        :param entries: 本轮扫描结果（scan_files 产出的 DirEntry）
+        :return: (新增或修改过的 DirEntry 列表, 已消失的路径列表)
+        """
+        seen = set()
+        changed = []
+        for entry in entries:
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            seen.add(entry.path)
+            if self.files.get(entry.path) != (stat.st_size, stat.st_mtime_ns):
+                if entry.path in self.files:
+                    self.remove(entry.path)
+                changed.append(entry)
+        removed = [path for path in self.files if path not in seen]
+        for path in removed:
+            self.remove(path)
+        return changed, removed
+
+    def remove(self, path):
+        """从索引中移除文件（HammingIndex 不支持删除，失效条目过多时整体重建）"""
+        size, _ = self.files.pop(path)
+        self.digests.pop(path, None)
+        if path in self.by_size.get(size, ()):
+            self.by_size[size].remove(path)
+        if self.hashes.pop(path, None) is not None and len(self.index) > 2 * len(self.hashes) + 1024:
+            self.index = HammingIndex(self.max_distance, hash_bits(self.algorithm, self.hash_size))
+            for kept_path, hash_value in self.hashes.items():
+                self.index.add(hash_value, kept_path)
+
+    def seed(self, files, keepers, executor=None):
+        """
+        用整体去重（build_duplicate_groups）的结果建立索引：扫描到的文件都记为已处理，
+        只有各组保留的图片和没有重复的图片参与之后的比对
+        :param files: {路径: (大小, 修改时间)}
+        :param keepers: 加入比对索引的路径（按扫描顺序）
+        :param executor: create_hash_pool 创建的进程池，None 表示在当前线程计算
+        """
+        self.files.update(files)
+        for path, hash_value, _ in compute_hashes([path for path in keepers if path in files], self.algorithm,
+                                                  self.hash_size, self.cache, executor):
+            self.by_size.setdefault(files[path][0], []).append(path)
+            if hash_value is not None:
+                self.hashes[path] = hash_value
+                self.index.add(hash_value, path)
+
+    def _digest(self, path):
+        if path not in self.digests:
+            self.digests[path] = get_file_md5(path, cache=self.cache)
+        return self.digests[path]
+
+    def _match(self, path, size, hash_value):
+        """与已保留的文件比对：先比同大小文件的完整哈希，再查相似哈希索引"""
+        for other in self.by_size.get(size, ()):
+            if self._digest(other) == self._digest(path):
+                return "exact", other
+        if hash_value is not None:
+            for _, other in self.index.query(hash_value):
+                # 被修改或重新加入的文件在 HammingIndex 中还留有旧哈希，按当前哈希重新核对距离
+                if other in self.hashes and popcount(hash_value ^ self.hashes[other]) <= self.max_distance:
+                    return "similar", other
+        return None, None
+
+    def update(self, entries, executor=None):
+        """
+        按顺序处理新增或修改过的文件，没有重复的加入索引
+        :param entries: diff 返回的 DirEntry 列表
+        :param executor: create_hash_pool 创建的进程池，None 表示在当前线程计算
+        :return: [(路径, "exact"/"similar"/None, 保留的路径, 错误信息)]
+        """
+        stats = {}
+        for entry in entries:
+            try:
+                stats[entry.path] = entry.stat()
+            except OSError:
+                continue
+            if self.cache is not None:
+                self.cache.check_stat(entry.path, stats[entry.path])
+        results = []
+        for path, hash_value, error in compute_hashes(list(stats), self.algorithm, self.hash_size,
+                                                      self.cache, executor):
+            size = stats[path].st_size
+            self.files[path] = (size, stats[path].st_mtime_ns)
+            try:
+                kind, other = self._match(path, size, hash_value)
+            except OSError as e:
+                results.append((path, None, None, str(e)))
+                continue
+            if kind is None:
+                self.by_size.setdefault(size, []).append(path)
+                if hash_value is not None:
+                    self.hashes[path] = hash_value
+                    self.index.add(hash_value, path)
+            results.append((path, kind, other, error))
+        return results
+
 
 def del_file(path):
+    """删除文件，成功返回 True"""
     try:
         os.remove(path)
         print(f"文件 {path} 已删除")
+        return True
     except Exception as e:
         print(f"删除文件 {path} 时出错: {e}")
+        return False
 
 '去除指定文件夹下重复或相似的文件并删除-验证OK的'
 if __name__ == '__main__':
@@ -1,5 +1,25 @@
 import os
-from typing import Union
+import hashlib
+import heapq
+import json
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from functools import partial
+from typing import Callable, List, Tuple, Union
+
+# 并行统计的默认线程数：网络盘（NFS/SMB）上 stat 主要在等待往返，线程数可以远多于 CPU 核数
+SIZE_WORKERS = 16
+# 统计结果中保留的最大文件 / 最大文件夹个数（有界堆，不随文件总数增长）
+TOP_N = 100
+# 大小索引累计多少条新记录写一次库
+SIZE_INDEX_FLUSH = 5000
+# 输出行攒批：距上次输出超过该秒数或攒够该行数时一次性交给回调
+LOG_BATCH_INTERVAL = 0.1
+LOG_BATCH_LINES = 500
+# st_blocks 的单位固定为 512 字节（与文件系统块大小无关）
+STAT_BLOCK_SIZE = 512
 
 
 def convert_size(size_bytes: int) -> str:
@@ -19,80 +39,514 @@ def convert_size(size_bytes: int) -> str:
     return f"{size_bytes:.2f} {size_names[i]}"
 
 
-def get_file_size(file_path: str) -> Union[int, None]:
+class LineBatcher:
+    """
+    把输出行攒成批再交给回调（如 Qt 信号），避免每行一次跨线程通知
+    有行待输出时启动定时器，行很少时（如偶尔的权限警告）也最多等 interval 秒就输出，不会一直压到统计结束
+    可在多个线程中同时 add，统计结束后调用 flush 输出剩余的行
+    """
+
+    def __init__(self, callback: Callable[[List[str]], None], interval: float = LOG_BATCH_INTERVAL,
+                 max_lines: int = LOG_BATCH_LINES):
+        self.callback = callback
+        self.interval = interval
+        self.max_lines = max_lines
+        self.lines = []
+        self.last_emit = time.monotonic()
+        self.timer = None
+        self.lock = threading.Lock()
+
+    def add(self, line: str) -> None:
+        with self.lock:
+            self.lines.append(line)
+            waited = time.monotonic() - self.last_emit
+            if len(self.lines) >= self.max_lines or waited >= self.interval:
+                self._emit()
+            elif self.timer is None:
+                self.timer = threading.Timer(self.interval - waited, self._on_timer)
+                self.timer.daemon = True
+                self.timer.start()
+
+    def flush(self) -> None:
+        with self.lock:
+            if self.lines:
+                self._emit()
+
+    def _on_timer(self):
+        with self.lock:
+            self.timer = None
+            if self.lines:
+                self._emit()
+
+    def _emit(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        lines, self.lines = self.lines, []
+        self.last_emit = time.monotonic()
+        self.callback(lines)
+
+
+class InodeSet:
+    """
+    已统计过的硬链接文件，多个线程共享
+    (st_dev, st_ino) 合并成一个整数保存，比元组省内存；只有 st_nlink > 1 的文件才会放进来
+    """
+
+    def __init__(self):
+        self.seen = set()
+        self.lock = threading.Lock()
+
+    def add(self, stat: os.stat_result) -> bool:
+        """登记文件，第一次见到返回 True，同一文件的其它硬链接返回 False"""
+        key = (stat.st_dev << 64) | stat.st_ino
+        with self.lock:
+            if key in self.seen:
+                return False
+            self.seen.add(key)
+            return True
+
+
+def stat_size(stat: os.stat_result, allocated: bool = False) -> int:
+    """
+    文件的字节数
+    :param stat: stat 结果
+    :param allocated: True 为实际占用的磁盘空间（st_blocks * 512，稀疏/压缩文件更小，小文件按块向上取整），
+                      Windows 上没有 st_blocks，退回文件大小
+    """
+    if allocated and hasattr(stat, "st_blocks"):
+        return stat.st_blocks * STAT_BLOCK_SIZE
+    return stat.st_size
+
+
+def _entry_stat(entry: os.DirEntry, full: bool = False) -> os.stat_result:
+    """
+    DirEntry 的 stat 结果（不跟随符号链接）
+    Windows 上 DirEntry.stat() 来自列目录的结果，st_dev/st_ino/st_nlink 恒为 0，需要时（full）另行 stat
+    """
+    if full and os.name == "nt":
+        return os.stat(entry.path, follow_symlinks=False)
+    return entry.stat(follow_symlinks=False)
+
+
+def get_file_size(file_path: str, log: Callable[[str], None] = print, allocated: bool = False) -> Union[int, None]:
     """
     获取单个文件的大小（字节），处理异常
     :param file_path: 文件路径
+    :param log: 输出函数
+    :param allocated: 是否按实际占用的磁盘空间统计
     :return: 字节数 / None（失败时）
     """
     try:
         # 跳过符号链接，避免循环/错误
         if os.path.islink(file_path):
-            print(f"⚠️  跳过符号链接: {file_path}")
+            log(f"⚠️  跳过符号链接: {file_path}")
             return 0
-        return os.path.getsize(file_path)
+        return stat_size(os.stat(file_path), allocated)
     except PermissionError:
-        print(f"❌ 权限不足，无法读取: {file_path}")
+        log(f"❌ 权限不足，无法读取: {file_path}")
         return 0
     except FileNotFoundError:
-        print(f"❌ 文件不存在: {file_path}")
+        log(f"❌ 文件不存在: {file_path}")
         return 0
     except Exception as e:
-        print(f"❌ 读取失败 {file_path}: {str(e)}")
+        log(f"❌ 读取失败 {file_path}: {str(e)}")
         return 0
 
 
-def get_dir_total_size(dir_path: str, show_detail: bool = True,show_size: int = 0) -> int:
+class DirNode:
+    """
+    文件夹大小树的一个节点
+    own_size/own_files 为该文件夹直接包含的文件，size/file_count 为汇总全部子文件夹后的总量
+    """
+    # 大卷上可能有上百万个文件夹，固定属性以减少每个节点的内存
+    __slots__ = ("path", "parent", "children", "own_size", "own_files", "size", "file_count")
+
+    def __init__(self, path: str, parent: "DirNode" = None):
+        self.path = path
+        self.parent = parent
+        self.children = []
+        self.own_size = 0
+        self.own_files = 0
+        self.size = 0
+        self.file_count = 0
+
+
+class SizeIndex:
+    """
+    文件夹大小索引（SQLite）：以 相对路径 为键，保存文件夹的修改时间、直接包含的文件字节数/文件数、
+    子文件夹名和其中最大的若干个文件；再次统计时修改时间未变的文件夹直接复用记录，不再列目录、stat 其中的文件
+    注意：文件夹的修改时间只在其中增删、重命名条目时变化，文件原地改写（如日志追加）不会被发现
+    打开时把记录全部读入内存，新结果批量写回；save 同时删除本次未访问到的文件夹记录
+    """
+
+    def __init__(self, db_path: str, root: str):
+        self.root = root
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS dirs ("
+                          "path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER, files INTEGER, "
+                          "sub_dirs TEXT, top_files TEXT)")
+        # 相对路径 -> (修改时间, 字节数, 文件数, 子文件夹名 JSON, 最大文件 JSON)，统计过程中只读，可在线程中查询
+        self.entries = {row[0]: row[1:] for row in
+                        self.conn.execute("SELECT path, mtime_ns, size, files, sub_dirs, top_files FROM dirs")}
+        self.seen = set()  # 本次访问到的文件夹
+        self.pending = []  # 待写入的记录
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, dir_path: str, mtime_ns: int, top_n: int = TOP_N):
+        """
+        取修改时间未变的文件夹记录，没有、已失效或保存的最大文件不足 top_n 个时返回 None
+        :return: (文件总字节数, 文件个数, 子文件夹路径列表, 最大的文件 [(字节数, 路径)])
+        """
+        entry = self.entries.get(os.path.relpath(dir_path, self.root))
+        if entry is None or entry[0] != mtime_ns:
+            return None
+        _, size, files, sub_dirs, top_files = entry
+        top_files = json.loads(top_files)
+        if len(top_files) < min(top_n, files):
+            return None
+        return (size, files,
+                [os.path.join(dir_path, name) for name in json.loads(sub_dirs)],
+                [(file_size, os.path.join(dir_path, name)) for name, file_size in top_files])
+
+    def record(self, dir_path: str, mtime_ns: int, result, cached: bool) -> None:
+        """
+        记录一个文件夹的统计结果（result 同 scan_dir 的返回值，最大文件不按阈值过滤）
+        :param cached: 是否来自 lookup，是则无需重写
+        """
+        key = os.path.relpath(dir_path, self.root)
+        self.seen.add(key)
+        if cached:
+            self.hits += 1
+            return
+        self.misses += 1
+        if mtime_ns is None:
+            return
+        size, files, sub_dirs, top_files = result
+        self.pending.append((key, mtime_ns, size, files,
+                             json.dumps([os.path.basename(path) for path in sub_dirs], ensure_ascii=False),
+                             json.dumps([[os.path.basename(path), file_size] for file_size, path in top_files],
+                                        ensure_ascii=False)))
+        if len(self.pending) >= SIZE_INDEX_FLUSH:
+            self.flush()
+
+    def flush(self) -> None:
+        """把新记录写入数据库"""
+        with self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO dirs (path, mtime_ns, size, files, sub_dirs, top_files) "
+                                  "VALUES (?, ?, ?, ?, ?, ?)", self.pending)
+        self.pending = []
+
+    def save(self) -> None:
+        """写入新记录，并删除本次未访问到的文件夹（已删除或移走）"""
+        self.flush()
+        removed = [(key,) for key in self.entries if key not in self.seen]
+        with self.conn:
+            self.conn.executemany("DELETE FROM dirs WHERE path = ?", removed)
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def _user_cache_dir() -> str:
+    """用户缓存目录（Windows 为 %LOCALAPPDATA%\\python_ui，其它系统为 ~/.cache/python_ui）"""
+    base = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "python_ui")
+
+
+def open_size_index(folder: str, allocated: bool = False, one_filesystem: bool = False) -> SizeIndex:
+    """
+    打开文件夹的大小索引，放在用户缓存目录：
+    写进被统计的文件夹会改变它的大小和修改时间，让下次统计的根目录记录失效
+    统计口径不同（占用空间 / 不跨文件系统）的结果分别保存
     """
-    递归计算文件夹总大小（含子文件夹），可选输出每个文件的大小明细
+    cache_dir = _user_cache_dir()
+    os.makedirs(cache_dir, exist_ok=True)
+    name = hashlib.md5(os.path.abspath(folder).encode("utf-8")).hexdigest()
+    if allocated:
+        name += "_alloc"
+    if one_filesystem:
+        name += "_onefs"
+    return SizeIndex(os.path.join(cache_dir, f"size_{name}.db"), folder)
+
+
+class SizeResult:
+    """
+    calculate_path_size 的统计结果
+    root 为文件夹大小树的根节点（统计单个文件时只有这一个节点），
+    largest_files / largest_dirs 为 [(字节数, 路径)]，按大小从大到小排列
+    """
+
+    def __init__(self, root: DirNode, largest_files: List[Tuple[int, str]] = None,
+                 largest_dirs: List[Tuple[int, str]] = None, reused_dirs: int = 0):
+        self.root = root
+        self.largest_files = largest_files or []
+        self.largest_dirs = largest_dirs or []
+        self.reused_dirs = reused_dirs  # 从大小索引直接复用的文件夹个数
+
+    @property
+    def total_size(self) -> int:
+        return self.root.size
+
+    @property
+    def file_count(self) -> int:
+        return self.root.file_count
+
+    def __str__(self):
+        # 兼容旧用法：直接格式化结果即得到带单位的总大小
+        return convert_size(self.total_size)
+
+
+def push_top(heap: List[Tuple[int, str]], item: Tuple[int, str], top_n: int = TOP_N) -> None:
+    """
+    把 (字节数, 路径) 放进最多 top_n 项的最小堆，堆满时挤掉其中最小的一项
+    :param heap: 最小堆
+    :param item: (字节数, 路径)
+    :param top_n: 堆的容量
+    """
+    if len(heap) < top_n:
+        heapq.heappush(heap, item)
+    elif item > heap[0]:
+        heapq.heapreplace(heap, item)
+
+
+def scan_dir(dir_path: str, show_size: int = 0, top_n: int = TOP_N, log: Callable[[str], None] = print,
+             allocated: bool = False, inodes: InodeSet = None,
+             root_dev: int = None) -> Tuple[int, int, List[str], List[Tuple[int, str]]]:
+    """
+    统计单个文件夹（不含子文件夹）中文件的大小
+    os.scandir 列目录时已带回文件类型，DirEntry.stat(follow_symlinks=False) 的结果会被缓存，
+    每个文件最多一次 stat（Windows 上不需要额外的系统调用）
     :param dir_path: 文件夹路径
-    :param show_detail: 是否显示每个文件的大小明细
-    :return: 总字节数
+    :param show_size: 只记录大于该字节数的文件
+    :param top_n: 最多记录的大文件个数
+    :param log: 输出函数（会在线程池中调用，需线程安全，如 LineBatcher.add）
+    :param allocated: 是否按实际占用的磁盘空间统计
+    :param inodes: 硬链接去重用的 InodeSet，同一文件的多个硬链接只统计第一个
+    :param root_dev: 根目录所在设备号，给出时跳过其它文件系统（挂载点）下的子文件夹
+    :return: (文件总字节数, 文件个数, 子文件夹路径列表, 该文件夹内最大的文件 [(字节数, 路径)])
     """
     total_size = 0
-    # 遍历文件夹（递归）
-    for root, dirs, files in os.walk(dir_path):
-        for file in files:
-            file_path = os.path.join(root, file)
-            file_size = get_file_size(file_path)
-            if file_size is None:
-                continue
-            total_size += file_size
-            # 输出单个文件明细
-            if show_detail and file_size>show_size:
-                print(f"📄 {file_path:<60} {convert_size(file_size)}")
-    return total_size
-
-
-def calculate_path_size(target_path: str, show_detail: bool = True,show_size: int = 0) -> None:
-    """
-    主函数：判断路径类型（文件/文件夹），计算并输出大小
+    file_count = 0
+    sub_dirs = []
+    big_files = []
+    try:
+        with os.scandir(dir_path) as entries:
+            for entry in entries:
+                try:
+                    # 跳过符号链接，避免循环/错误
+                    if entry.is_symlink():
+                        log(f"⚠️  跳过符号链接: {entry.path}")
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        if root_dev is not None and _entry_stat(entry, True).st_dev != root_dev:
+                            log(f"⏭️ 跳过其它文件系统: {entry.path}")
+                            continue
+                        sub_dirs.append(entry.path)
+                        continue
+                    stat = _entry_stat(entry, inodes is not None)
+                    if inodes is not None and stat.st_nlink > 1 and not inodes.add(stat):
+                        continue
+                    file_size = stat_size(stat, allocated)
+                except PermissionError:
+                    log(f"❌ 权限不足，无法读取: {entry.path}")
+                    continue
+                except OSError as e:
+                    log(f"❌ 读取失败 {entry.path}: {str(e)}")
+                    continue
+                total_size += file_size
+                file_count += 1
+                if file_size > show_size:
+                    push_top(big_files, (file_size, entry.path), top_n)
+    except PermissionError:
+        log(f"❌ 权限不足，无法读取: {dir_path}")
+    except OSError as e:
+        log(f"❌ 读取失败 {dir_path}: {str(e)}")
+    return total_size, file_count, sub_dirs, big_files
+
+
+def scan_dir_indexed(dir_path: str, index: SizeIndex, top_n: int = TOP_N, log: Callable[[str], None] = print,
+                     allocated: bool = False, root_dev: int = None):
+    """
+    借助大小索引统计单个文件夹：先 stat 文件夹本身，修改时间未变则直接复用索引记录
+    最大文件不按阈值过滤，索引中的记录换个阈值也能继续使用
+    挂载不改变上级文件夹的修改时间，root_dev 给出时对文件夹本身再核对一次设备号
+    :return: (scan_dir 格式的结果, 文件夹修改时间, 是否来自索引)
+    """
+    try:
+        stat = os.stat(dir_path)
+    except OSError:
+        return scan_dir(dir_path, 0, top_n, log, allocated, root_dev=root_dev), None, False
+    if root_dev is not None and stat.st_dev != root_dev:
+        log(f"⏭️ 跳过其它文件系统: {dir_path}")
+        return (0, 0, [], []), None, False
+    cached = index.lookup(dir_path, stat.st_mtime_ns, top_n)
+    if cached is not None:
+        return cached, stat.st_mtime_ns, True
+    return scan_dir(dir_path, 0, top_n, log, allocated, root_dev=root_dev), stat.st_mtime_ns, False
+
+
+def build_size_tree(dir_path: str, show_size: int = 0, top_n: int = TOP_N,
+                    workers: int = SIZE_WORKERS, index: SizeIndex = None,
+                    log: Callable[[str], None] = print, allocated: bool = False,
+                    dedup_hardlinks: bool = False, one_filesystem: bool = False) -> SizeResult:
+    """
+    统计文件夹大小树（类似 du）：每个文件夹的字节数和文件数都汇总了全部子文件夹
+    每个文件夹作为一个任务交给线程池，子文件夹一经发现就提交，多个文件夹的 stat 等待相互重叠；
+    最大的文件只保留在有界堆里，不逐个输出
+    文件夹的修改时间不会随更深层的变化而改变，传入 index 时仍会逐个 stat 每个文件夹，
+    但修改时间未变的文件夹不再列目录、stat 其中的文件
+    :param dir_path: 文件夹路径
+    :param show_size: 只记录大于该字节数的文件
+    :param top_n: 保留的最大文件 / 文件夹个数
+    :param workers: 线程数，<=1 时在当前线程逐个文件夹统计
+    :param index: 大小索引（SizeIndex），为 None 时全部重新扫描
+    :param log: 输出函数（会在线程池中调用，需线程安全，如 LineBatcher.add）
+    :param allocated: 是否按实际占用的磁盘空间（st_blocks）统计，默认为文件大小
+    :param dedup_hardlinks: 同一文件的多个硬链接只统计一次；复用索引的文件夹无法去重，因此与 index 互斥
+    :param one_filesystem: 不进入挂载在其下的其它文件系统
+    :return: SizeResult
+    """
+    if dedup_hardlinks and index is not None:
+        raise ValueError("硬链接去重需要逐个 stat 文件，不能与大小索引同时使用")
+    root_dev = os.stat(dir_path).st_dev if one_filesystem else None
+    root = DirNode(dir_path)
+    # 按发现顺序记录所有节点：子节点总在父节点之后，倒序遍历即可自底向上汇总
+    nodes = [root]
+    largest_files = []
+
+    if index is None:
+        job = partial(scan_dir, show_size=show_size, top_n=top_n, log=log, allocated=allocated,
+                      inodes=InodeSet() if dedup_hardlinks else None, root_dev=root_dev)
+    else:
+        job = partial(scan_dir_indexed, index=index, top_n=top_n, log=log, allocated=allocated, root_dev=root_dev)
+
+    def collect(node, job_result):
+        if index is not None:
+            result, mtime_ns, cached = job_result
+            index.record(node.path, mtime_ns, result, cached)
+        else:
+            result = job_result
+        node.own_size, node.own_files, sub_dirs, big_files = result
+        for item in big_files:
+            if item[0] > show_size:
+                push_top(largest_files, item, top_n)
+        node.children = [DirNode(sub_dir, node) for sub_dir in sub_dirs]
+        nodes.extend(node.children)
+        return node.children
+
+    if workers <= 1:
+        pending_nodes = [root]
+        while pending_nodes:
+            node = pending_nodes.pop()
+            pending_nodes.extend(collect(node, job(node.path)))
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = {executor.submit(job, dir_path): root}
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    node = pending.pop(future)
+                    for child in collect(node, future.result()):
+                        pending[executor.submit(job, child.path)] = child
+
+    for node in reversed(nodes):
+        node.size += node.own_size
+        node.file_count += node.own_files
+        if node.parent is not None:
+            node.parent.size += node.size
+            node.parent.file_count += node.file_count
+
+    largest_dirs = heapq.nlargest(top_n, nodes[1:], key=lambda n: n.size)
+    return SizeResult(root,
+                      sorted(largest_files, reverse=True),
+                      [(node.size, node.path) for node in largest_dirs],
+                      index.hits if index is not None else 0)
+
+
+def get_dir_total_size(dir_path: str, show_detail: bool = True, show_size: int = 0,
+                       workers: int = SIZE_WORKERS, log: Callable[[str], None] = print) -> int:
+    """
+    递归计算文件夹总大小（含子文件夹），可选输出最大的若干个文件
+    :param dir_path: 文件夹路径
+    :param show_detail: 是否输出最大文件明细
+    :param show_size: 只输出大于该字节数的文件
+    :param workers: 线程数，<=1 时在当前线程逐个文件夹统计
+    :param log: 输出函数
+    :return: 总字节数
+    """
+    result = build_size_tree(dir_path, show_size=show_size, workers=workers, log=log)
+    if show_detail:
+        for file_size, file_path in result.largest_files:
+            log(f"📄 {file_path:<60} {convert_size(file_size)}")
+    return result.total_size
+
+
+def calculate_path_size(target_path: str, show_detail: bool = True,show_size: int = 0,
+                        workers: int = SIZE_WORKERS, top_n: int = TOP_N, use_index: bool = False,
+                        log: Callable[[str], None] = print, allocated: bool = False,
+                        dedup_hardlinks: bool = False, one_filesystem: bool = False) -> SizeResult:
+    """
+    主函数：判断路径类型（文件/文件夹），计算大小并返回汇总结果
     :param target_path: 目标文件/文件夹路径
-    :param show_detail: 是否显示文件夹内文件明细
+    :param show_detail: 是否输出最大的文件 / 文件夹明细
+    :param show_size: 只记录大于该字节数的文件
+    :param workers: 统计文件夹时的并行线程数
+    :param top_n: 保留的最大文件 / 文件夹个数
+    :param use_index: 是否使用持久化的大小索引，只重新扫描修改时间变化的文件夹
+    :param log: 输出函数，默认 print；界面中传入 LineBatcher.add 批量转发
+    :param allocated: 是否按实际占用的磁盘空间（st_blocks）统计，默认为文件大小
+    :param dedup_hardlinks: 同一文件的多个硬链接只统计一次（此时不使用大小索引）
+    :param one_filesystem: 不进入挂载在其下的其它文件系统
+    :return: SizeResult（str() 后为带单位的总大小）
     """
     # 检查路径是否存在
     if not os.path.exists(target_path):
-        print(f"❌ 路径不存在: {target_path}")
-        return convert_size(0)
+        log(f"❌ 路径不存在: {target_path}")
+        return SizeResult(DirNode(target_path))
 
     # 处理单个文件
     if os.path.isfile(target_path):
-        file_size = get_file_size(target_path)
-        if file_size is not None and file_size>show_size:
-            print(f"\n📌 单个文件大小：")
-            print(f"文件路径: {target_path}")
-            print(f"大小: {convert_size(file_size)}")
-            return convert_size(file_size)
-        else:
-            return convert_size(0)
+        node = DirNode(target_path)
+        file_size = get_file_size(target_path, log, allocated) or 0
+        node.own_size = node.size = file_size
+        node.own_files = node.file_count = 1
+        log(f"\n📌 单个文件大小：")
+        log(f"文件路径: {target_path}")
+        log(f"大小: {convert_size(file_size)}")
+        return SizeResult(node, [(file_size, target_path)] if file_size > show_size else [])
     # 处理文件夹
-    elif os.path.isdir(target_path):
-        print(f"\n📌 文件夹 '{target_path}' 及其子文件大小明细：")
-        print("-" * 80)
-        total_size = get_dir_total_size(target_path, show_detail=show_detail,show_size=show_size)
-        print("-" * 80)
-        print(f"📊 文件夹总大小: {convert_size(total_size)}")
-        return convert_size(total_size)
+    log(f"\n📌 文件夹 '{target_path}' 大小统计：")
+    index = None
+    if use_index and dedup_hardlinks:
+        log("⚠️  硬链接去重需要逐个 stat 文件，本次不使用大小索引")
+    elif use_index:
+        try:
+            index = open_size_index(target_path, allocated, one_filesystem)
+        except (OSError, sqlite3.Error) as e:
+            log(f"⚠️  大小索引打开失败，全部重新扫描: {str(e)}")
+    try:
+        result = build_size_tree(target_path, show_size=show_size, top_n=top_n, workers=workers,
+                                 index=index, log=log, allocated=allocated,
+                                 dedup_hardlinks=dedup_hardlinks, one_filesystem=one_filesystem)
+        if index is not None:
+            index.save()
+            log(f"♻️ 大小索引：复用 {index.hits} 个文件夹，重新扫描 {index.misses} 个")
+    finally:
+        if index is not None:
+            index.close()
+    if show_detail:
+        log("-" * 80)
+        log(f"📄 最大的 {len(result.largest_files)} 个文件：")
+        for file_size, file_path in result.largest_files:
+            log(f"   {file_path:<60} {convert_size(file_size)}")
+        log(f"📁 最大的 {len(result.largest_dirs)} 个文件夹：")
+        for dir_size, dir_path in result.largest_dirs:
+            log(f"   {dir_path:<60} {convert_size(dir_size)}")
+        log("-" * 80)
+    log(f"📊 文件夹总大小: {convert_size(result.total_size)}（{result.file_count} 个文件）")
+    return result
 
 '''
 判断文件或者文件夹下文件大小 OK
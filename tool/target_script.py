@@ -1,27 +1,1208 @@
 import cv2
+import json
+import math
+import multiprocessing
+import numpy as np
 import os
-def target_script_fun(video_path,output_dir):
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# 默认写图线程数（cv2编码/写盘时会释放GIL，多线程可并行利用多核）
+DEFAULT_WORKERS = min(8, os.cpu_count() or 1)
+# 分段并行时子进程每处理多少帧回报一次进度（批量回报，减少进程间通信）
+SEGMENT_PROGRESS_BATCH = 50
+# 进度回调的最小间隔（秒），即每秒最多回报约4次
+PROGRESS_INTERVAL = 0.25
+
+
+# 输出格式：格式名 -> (扩展名, 压缩参数ID, 参数取值范围)
+# png 的参数为压缩级别（0最快/9最小），jpg/webp 为质量（越大越清晰）；npy 为原始数组不压缩
+OUTPUT_FORMATS = {
+    "png": (".png", cv2.IMWRITE_PNG_COMPRESSION, (0, 9)),
+    "jpg": (".jpg", cv2.IMWRITE_JPEG_QUALITY, (0, 100)),
+    "webp": (".webp", cv2.IMWRITE_WEBP_QUALITY, (1, 100)),
+    "npy": (".npy", None, None),
+}
+
+
+# 帧堆叠输出：所有帧写入同一个预分配的 numpy.memmap 文件，附带 JSON 描述文件
+FRAME_STACK_FORMAT = "memmap"
+FRAME_STACK_DATA = "frames.dat"
+FRAME_STACK_META = "frames.json"
+# 输出帧会被过滤（仅关键帧/相似帧过滤）时按全部帧预估的容量远大于实际，
+# 帧堆叠从该帧数起按1.5倍扩容（NTFS 上预分配的文件不是稀疏文件，会真实占满磁盘）
+FRAME_STACK_FILTERED_CAPACITY = 64
+
+
+def _frame_path(output_dir, index, ext=".png"):
+    """帧图片输出路径（保持 frame_%06d 命名）"""
+    return os.path.join(output_dir, f"frame_{index:06d}{ext}")
+
+
+def _make_frame_writer(output_dir, image_format="png", quality=None):
+    """
+    按输出格式生成写帧函数 write(index, frame) -> 写入字节数
+    :param image_format: 输出格式，见 OUTPUT_FORMATS
+    :param quality: png 压缩级别 / jpg、webp 质量，None 表示使用 OpenCV 默认值
+    """
+    if image_format not in OUTPUT_FORMATS:
+        raise ValueError(f"不支持的输出格式：{image_format}")
+    ext, param_id, value_range = OUTPUT_FORMATS[image_format]
+
+    if param_id is None:
+        def write_npy(index, frame):
+            np.save(_frame_path(output_dir, index, ext), frame)
+            return frame.nbytes
+        return write_npy
+
+    params = []
+    if quality is not None:
+        low, high = value_range
+        params = [param_id, min(max(int(quality), low), high)]
+
+    def write_image(index, frame):
+        # 先编码再写盘，可直接得到写入字节数（等价于 cv2.imwrite，且支持中文路径）
+        path = _frame_path(output_dir, index, ext)
+        ok, buf = cv2.imencode(ext, frame, params)
+        if not ok:
+            raise IOError(f"编码失败：{path}")
+        buf.tofile(path)
+        return buf.size
+    return write_image
+
+
+# 缩放插值方式：名称 -> OpenCV 常量（缩小推荐 area，放大推荐 cubic/lanczos）
+INTERPOLATIONS = {
+    "area": cv2.INTER_AREA,
+    "linear": cv2.INTER_LINEAR,
+    "cubic": cv2.INTER_CUBIC,
+    "nearest": cv2.INTER_NEAREST,
+    "lanczos": cv2.INTER_LANCZOS4,
+}
+
+
+def _crop_roi(frame, roi):
+    """按 (x, y, 宽, 高) 裁剪感兴趣区域，超出画面的部分自动截掉；返回切片视图，不拷贝"""
+    x, y, w, h = (int(v) for v in roi)
+    height, width = frame.shape[:2]
+    x0, y0 = max(0, x), max(0, y)
+    x1, y1 = min(width, x + w), min(height, y + h)
+    if x1 <= x0 or y1 <= y0:
+        raise ValueError(f"裁剪区域 {list(roi)} 超出画面范围 {width}x{height}")
+    return frame[y0:y1, x0:x1]
+
+
+def _crop_frames(frames, roi):
+    """包装帧迭代器：解码后立即裁剪（只是切片），相似帧过滤也只比较裁剪区域"""
+    for index, frame in frames:
+        yield index, _crop_roi(frame, roi)
+
+
+def _make_frame_transform(resize=None, interpolation="area", grayscale=False):
+    """
+    生成编码前的帧变换 transform(frame) -> frame，无需变换时返回 None
+    变换在写图阶段执行（流水线模式下在写图线程中），输出越小编码与写盘越快
+    :param resize: 输出尺寸 (宽, 高)，其中一项为 0 时按原比例计算
+    :param interpolation: 缩放插值方式，见 INTERPOLATIONS
+    :param grayscale: 转为单通道灰度图
+    """
+    if interpolation not in INTERPOLATIONS:
+        raise ValueError(f"不支持的插值方式：{interpolation}")
+    width, height = (int(v or 0) for v in resize) if resize else (0, 0)
+    if width < 0 or height < 0:
+        raise ValueError(f"输出尺寸不能为负数：{list(resize)}")
+    if not (width or height or grayscale):
+        return None
+    flag = INTERPOLATIONS[interpolation]
+
+    def transform(frame):
+        # 先转灰度再缩放：缩放只需处理单通道，4K 缩到 480p 约快三分之一
+        if grayscale and frame.ndim == 3:
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        if width or height:
+            src_height, src_width = frame.shape[:2]
+            size = (width or max(1, round(src_width * height / src_height)),
+                    height or max(1, round(src_height * width / src_width)))
+            if size != (src_width, src_height):
+                frame = cv2.resize(frame, size, interpolation=flag)
+        return frame
+    return transform
+
+
+def _with_transform(write_frame, transform):
+    """给写帧函数加上编码前变换"""
+    if transform is None:
+        return write_frame
+
+    def write_transformed(index, frame):
+        return write_frame(index, transform(frame))
+    return write_transformed
+
+
+def _stack_capacity(expected, filtered=False):
+    """帧堆叠的预分配帧数：输出帧会被过滤时不按预估帧数一次性分配"""
+    if filtered:
+        return min(expected, FRAME_STACK_FILTERED_CAPACITY) if expected else FRAME_STACK_FILTERED_CAPACITY
+    return expected
+
+
+class FrameStackWriter:
+    """
+    帧堆叠写入器：把所有帧顺序写入一个 frames×H×W×C 的 numpy.memmap 文件，
+    避免逐帧创建大量小文件；结束时截断多余容量并写出 JSON 描述（帧率/帧序号/时间戳）
+    """
+
+    def __init__(self, output_dir, fps=0, capacity=0, resume=False):
+        self.data_path = os.path.join(output_dir, FRAME_STACK_DATA)
+        self.meta_path = os.path.join(output_dir, FRAME_STACK_META)
+        self.fps = fps
+        self.capacity = max(1, int(capacity or 0))  # 预分配帧数，不足时按1.5倍扩容
+        self.stack = None
+        self.frame_shape = None
+        self.dtype = None
+        self.frame_indices = []
+        if resume and os.path.exists(self.meta_path) and os.path.exists(self.data_path):
+            # 断点续提：沿用已写入的帧，新帧追加在其后
+            with open(self.meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta["shape"][0]:
+                self.frame_shape = tuple(meta["shape"][1:])
+                self.dtype = np.dtype(meta["dtype"])
+                self.frame_indices = meta["frame_indices"]
+                self.capacity = max(self.capacity, len(self.frame_indices) + 1)
+
+    def _open(self, mode):
+        self.stack = np.memmap(self.data_path, dtype=self.dtype, mode=mode,
+                               shape=(self.capacity,) + self.frame_shape)
+
+    def __call__(self, index, frame):
+        if self.stack is None:
+            if self.frame_shape is None:
+                # 第一帧到达时才知道帧尺寸，按预估帧数一次性分配
+                self.frame_shape, self.dtype = frame.shape, frame.dtype
+                self._open("w+")
+            else:
+                self._open("r+")
+        if frame.shape != self.frame_shape:
+            raise ValueError(f"帧尺寸变化，无法写入帧堆叠：{frame.shape}")
+        position = len(self.frame_indices)
+        if position >= self.capacity:
+            self.stack.flush()
+            self.capacity = int(self.capacity * 1.5) + 1
+            self._open("r+")
+        self.stack[position] = frame
+        self.frame_indices.append(index)
+        return frame.nbytes
+
+    def sync(self):
+        """刷盘并写出当前描述文件（不截断，供断点记录使用）"""
+        if self.stack is not None:
+            self.stack.flush()
+        self._write_meta()
+
+    def close(self):
+        """刷盘、截断到实际帧数并写出描述文件"""
+        count = len(self.frame_indices)
+        if self.stack is not None:
+            self.stack.flush()
+            self.stack = None
+        if self.frame_shape is not None:
+            with open(self.data_path, "r+b") as f:
+                f.truncate(count * int(np.prod(self.frame_shape)) * self.dtype.itemsize)
+        self._write_meta()
+        return count
+
+    def _write_meta(self):
+        count = len(self.frame_indices)
+        shape, dtype = [0, 0, 0, 0], "uint8"
+        if self.frame_shape is not None:
+            shape, dtype = [count] + list(self.frame_shape), str(self.dtype)
+        meta = {
+            "shape": shape,
+            "dtype": dtype,
+            "fps": self.fps,
+            "frame_indices": self.frame_indices,
+            "timestamps": [round(i / self.fps, 6) for i in self.frame_indices] if self.fps else [],
+        }
+        with open(self.meta_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+
+
+def load_frame_stack(output_dir):
+    """
+    以零拷贝方式打开帧堆叠输出
+    :return: (frames×H×W×C 的只读 memmap, 描述信息 dict)
+    """
+    with open(os.path.join(output_dir, FRAME_STACK_META), encoding="utf-8") as f:
+        meta = json.load(f)
+    if not meta["shape"][0]:
+        return np.empty(meta["shape"], dtype=meta["dtype"]), meta
+    stack = np.memmap(os.path.join(output_dir, FRAME_STACK_DATA), dtype=meta["dtype"],
+                      mode="r", shape=tuple(meta["shape"]))
+    return stack, meta
+
+
+def _scan_keyframes(video_path):
+    """
+    以原始码流模式（不解码）扫描视频，返回关键帧（I帧）序号列表
+    仅 FFmpeg 后端支持，失败时返回空列表
+    """
+    cap = cv2.VideoCapture(video_path, cv2.CAP_FFMPEG, [cv2.CAP_PROP_FORMAT, -1])
+    keyframes = []
+    try:
+        index = 0
+        while cap.grab():
+            if cap.get(cv2.CAP_PROP_LRF_HAS_KEY_FRAME):
+                keyframes.append(index)
+            index += 1
+    finally:
+        cap.release()
+    return keyframes
+
+
+def _keyframes_in_range(keyframes, start_frame=0, end_frame=None):
+    """统计 [start_frame, end_frame) 范围内的关键帧个数，end_frame 为 None 表示到视频末尾"""
+    return sum(1 for index in keyframes if index >= start_frame and (end_frame is None or index < end_frame))
+
+
+def _is_sampled(offset, step, sample_ratio):
+    """
+    判断相对起点偏移 offset 的帧是否被采样（无状态，分段并行时各段结果一致）
+    :param sample_ratio: 输出帧率/源帧率，0 表示不按帧率采样
+    """
+    if offset % step:
+        return False
+    if sample_ratio and offset:
+        # 按输出帧率划分时间桶，每个桶只取第一个候选帧
+        return int(offset * sample_ratio) != int((offset - step) * sample_ratio)
+    return True
+
+
+def _iter_frames(cap, video_path, step=1, target_fps=0, start_sec=0, end_sec=0, keyframes_only=False,
+                 start_frame=None, end_frame=None, origin_frame=None, keyframes=None):
+    """
+    按采样规则逐帧产出 (源帧序号, 图像)
+    不需要的帧只 grab() 不 retrieve()，跳过颜色转换与拷贝；起始时间直接 seek 过去
+    :param step: 每隔 N 帧取一帧
+    :param target_fps: 输出帧率（0 表示不限制，即原帧率）
+    :param start_sec: 起始时间（秒）
+    :param end_sec: 结束时间（秒，0 表示到视频末尾）
+    :param keyframes_only: 仅提取关键帧（此时忽略 step/target_fps）
+    :param start_frame: 起始帧序号（分段提取用，优先于 start_sec）
+    :param end_frame: 结束帧序号，不含（分段提取用，优先于 end_sec）
+    :param origin_frame: 采样起点帧序号，默认与起始帧相同（分段提取时为整体起点）
+    :param keyframes: 已扫描好的关键帧序号列表（仅关键帧模式），None 时在此扫描
+    """
+    step = max(1, int(step or 1))
+    fps = cap.get(cv2.CAP_PROP_FPS) or 0
+
+    # 结束帧（不含）
+    if end_frame is None and end_sec and end_sec > 0 and fps > 0:
+        end_frame = int(math.ceil(end_sec * fps))
+
+    # 起始位置：直接 seek，避免从头解码
+    if start_frame is not None:
+        if start_frame > 0:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+    elif start_sec and start_sec > 0:
+        if fps > 0:
+            start_frame = int(round(start_sec * fps))
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+        else:
+            cap.set(cv2.CAP_PROP_POS_MSEC, start_sec * 1000)
+            start_frame = int(cap.get(cv2.CAP_PROP_POS_FRAMES))
+    else:
+        start_frame = 0
+    if origin_frame is None:
+        origin_frame = start_frame
+
+    if keyframes_only:
+        if keyframes is None:
+            keyframes = _scan_keyframes(video_path)
+        if not keyframes:
+            raise ValueError("无法识别关键帧（需 FFmpeg 后端支持）")
+        pos = start_frame
+        for index in keyframes:
+            if index < start_frame:
+                continue
+            if end_frame is not None and index >= end_frame:
+                break
+            # 关键帧可独立解码，直接 seek 到关键帧代价很小
+            if index != pos:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, index)
+            ret, frame = cap.read()
+            if not ret:
+                break
+            pos = index + 1
+            yield index, frame
+        return
+
+    sample_ratio = target_fps / fps if target_fps and target_fps > 0 and fps > target_fps else 0
+    index = start_frame
+    while True:
+        if end_frame is not None and index >= end_frame:
+            break
+        if not cap.grab():
+            break
+        # 帧率未知时只能按时间戳判断结束
+        if end_sec and end_sec > 0 and fps <= 0 and cap.get(cv2.CAP_PROP_POS_MSEC) > end_sec * 1000:
+            break
+        if _is_sampled(index - origin_frame, step, sample_ratio):
+            ret, frame = cap.retrieve()
+            if not ret:
+                break
+            yield index, frame
+        index += 1
+
+
+# 相似帧过滤方式：diff 为缩略灰度图平均像素差（0-255），phash 为感知哈希汉明距离（0-64）
+DEDUP_METHODS = ("diff", "phash")
+
+
+def _frame_signature(frame, method):
+    """计算用于相似比较的帧特征（先缩到 32x32 灰度，代价很小）"""
+    small = cv2.resize(frame, (32, 32), interpolation=cv2.INTER_AREA)
+    if small.ndim == 3:
+        small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    if method == "phash":
+        import imagehash
+        from PIL import Image
+        return imagehash.phash(Image.fromarray(small))
+    return small.astype(np.int16)
+
+
+def _skip_similar(frames, method="diff", threshold=0, reference=None):
+    """
+    包装帧迭代器：与上一张输出帧比较，变化量不超过 threshold 的帧直接丢弃，不再编码写盘
+    :param method: 比较方式，见 DEDUP_METHODS
+    :param threshold: 变化阈值，diff 为平均像素差，phash 为汉明距离
+    :param reference: 初始参照帧（断点续提时为断点前最后一张输出帧），None 表示第一帧总会输出
+    """
+    if method not in DEDUP_METHODS:
+        raise ValueError(f"不支持的相似帧比较方式：{method}")
+    last = _frame_signature(reference, method) if reference is not None else None
+    for index, frame in frames:
+        signature = _frame_signature(frame, method)
+        if last is not None:
+            if method == "phash":
+                change = signature - last
+            else:
+                change = float(np.abs(signature - last).mean())
+            if change <= threshold:
+                continue
+        last = signature
+        yield index, frame
+
+
+def _last_output_index(output_dir, image_format, start_frame, stop_frame):
+    """断点续提：查找 [start_frame, stop_frame) 内已输出的最后一帧序号，没有则返回 None"""
+    if image_format == FRAME_STACK_FORMAT:
+        meta_path = os.path.join(output_dir, FRAME_STACK_META)
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path, encoding="utf-8") as f:
+            indices = json.load(f)["frame_indices"]
+    else:
+        ext = OUTPUT_FORMATS[image_format][0]
+        indices = []
+        for name in os.listdir(output_dir):
+            if name.startswith("frame_") and name.endswith(ext) and name[6:-len(ext)].isdigit():
+                indices.append(int(name[6:-len(ext)]))
+    indices = [i for i in indices if start_frame <= i < stop_frame]
+    return max(indices) if indices else None
+
+
+def _resume_reference(cap, output_dir, image_format, segment):
+    """重新解码断点前最后一张输出帧，作为相似帧过滤的参照（与不中断时的过滤结果一致）"""
+    index = _last_output_index(output_dir, image_format, segment["start"], segment["next"])
+    if index is None:
+        return None
+    cap.set(cv2.CAP_PROP_POS_FRAMES, index)
+    ret, frame = cap.read()
+    return frame if ret else None
+
+
+def _expected_frames(total_frames, fps, step=1, target_fps=0, start_sec=0, end_sec=0):
+    """按采样设置估算输出帧数（用于进度显示与预分配，帧数属性不准时仅为近似值）"""
+    if total_frames <= 0:
+        return 0
+    start_frame, end_frame = 0, total_frames
+    if fps > 0:
+        if start_sec and start_sec > 0:
+            start_frame = min(total_frames, int(round(start_sec * fps)))
+        if end_sec and end_sec > 0:
+            end_frame = min(total_frames, int(math.ceil(end_sec * fps)))
+    length = max(0, end_frame - start_frame)
+    expected = int(math.ceil(length / max(1, int(step or 1))))
+    if target_fps and target_fps > 0 and fps > target_fps:
+        expected = min(expected, int(math.ceil(length * target_fps / fps)))
+    return expected
+
+
+class ExtractProgress:
+    """
+    提取进度统计：已解码/已写盘帧数、写盘字节数，按 PROGRESS_INTERVAL 节流回调
+    回调参数为 dict：done 已解码(采样后)帧数、written 已写盘帧数、total 预计帧数、
+    decode_fps 解码速度、write_mbps 写盘速度(MB/s)、eta 剩余秒数(未知为None)、
+    queue_fill 写图队列占用率(仅流水线模式，接近1说明写盘是瓶颈，接近0说明解码是瓶颈)、
+    bytes_written 已写盘字节数
+    """
+
+    def __init__(self, total=0, callback=None, interval=PROGRESS_INTERVAL):
+        self.total = total
+        self.callback = callback
+        self.interval = interval
+        self.lock = threading.Lock()  # 写图线程会并发累加
+        self.start_time = time.time()
+        self.last_report = 0
+        self.decoded = 0
+        self.written = 0
+        self.bytes_written = 0
+        self.queue_fill = None
+
+    def add_decoded(self, count=1):
+        with self.lock:
+            self.decoded += count
+
+    def add_written(self, count=1, nbytes=0):
+        with self.lock:
+            self.written += count
+            self.bytes_written += nbytes
+
+    def snapshot(self):
+        elapsed = max(time.time() - self.start_time, 1e-6)
+        with self.lock:
+            decoded, written, nbytes = self.decoded, self.written, self.bytes_written
+        decode_fps = decoded / elapsed
+        eta = None
+        if self.total and decode_fps > 0:
+            eta = max(0.0, (self.total - decoded) / decode_fps)
+        return {
+            "done": decoded,
+            "written": written,
+            "total": self.total,
+            "elapsed": elapsed,
+            "decode_fps": decode_fps,
+            "write_mbps": nbytes / elapsed / (1024 * 1024),
+            "eta": eta,
+            "queue_fill": self.queue_fill,
+            "bytes_written": nbytes,
+        }
+
+    def report(self, force=False):
+        """节流回调进度；force=True 时立即回调（用于结束时）"""
+        if not self.callback:
+            return
+        now = time.time()
+        if not force and now - self.last_report < self.interval:
+            return
+        self.last_report = now
+        self.callback(self.snapshot())
+
+    def summary(self):
+        stats = self.snapshot()
+        return (f"用时 {stats['elapsed']:.1f} 秒，解码 {stats['decode_fps']:.1f} 帧/秒，"
+                f"写盘 {stats['write_mbps']:.1f} MB/秒")
+
+
+class FrameWatermark:
+    """
+    断点水位：next_frame 之前的源帧都已写盘（或按采样/相似帧规则无需写盘）
+    写图线程异步写盘时，已派发未完成的帧会压住水位，保证续提时不会漏帧
+    """
+
+    def __init__(self, start_frame):
+        self.lock = threading.Lock()
+        self.next_candidate = start_frame
+        self.in_flight = set()
+
+    def dispatch(self, index):
+        """帧交给写图线程（在放入队列前调用）"""
+        with self.lock:
+            self.in_flight.add(index)
+
+    def done(self, index):
+        """写图线程写盘完成"""
+        with self.lock:
+            self.in_flight.discard(index)
+
+    def advance(self, index):
+        """下游已处理完该帧（同步写盘 / 已派发 / 被过滤）"""
+        with self.lock:
+            self.next_candidate = index + 1
+
+    @property
+    def next_frame(self):
+        with self.lock:
+            if self.in_flight:
+                return min(min(self.in_flight), self.next_candidate)
+            return self.next_candidate
+
+
+def _track_frames(frames, progress=None, watermark=None, cancel_event=None, on_tick=None):
+    """
+    包装帧迭代器：统计解码（采样后）帧数并节流回报进度、推进断点水位、响应取消
+    下游取走下一帧时，说明上一帧已处理完，此时推进水位
+    """
+    for index, frame in frames:
+        if cancel_event is not None and cancel_event.is_set():
+            return
+        if progress is not None:
+            progress.add_decoded()
+            progress.report()
+        yield index, frame
+        if watermark is not None:
+            watermark.advance(index)
+        if on_tick is not None:
+            on_tick()
+
+
+def _extract_serial(frames, write_frame, progress):
+    """串行提取：解码一帧、写一帧"""
+    frame_count = 0
+    for index, frame in frames:
+        progress.add_written(1, write_frame(index, frame))
+        frame_count += 1
+    return frame_count
+
+
+def _extract_pipelined(frames, write_frame, workers, progress, watermark=None):
+    """
+    流水线提取：当前线程负责解码，解码后的帧放入有界队列，
+    由 workers 个写图线程并行编码写盘
+    :return: 提取的帧数
+    """
+    # 有界队列：限制已解码未写盘的帧数，避免内存暴涨
+    frame_queue = queue.Queue(maxsize=workers * 4)
+    errors = []
+
+    def writer():
+        while True:
+            item = frame_queue.get()
+            if item is None:
+                break
+            if errors:
+                # 已有线程出错，只消费队列不再写盘，保证解码线程不会阻塞
+                continue
+            index, frame = item
+            try:
+                progress.add_written(1, write_frame(index, frame))
+                if watermark is not None:
+                    watermark.done(index)
+            except Exception as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=writer, daemon=True) for _ in range(workers)]
+    for t in threads:
+        t.start()
+
+    frame_count = 0
+    try:
+        for index, frame in frames:
+            if errors:
+                break
+            if watermark is not None:
+                watermark.dispatch(index)
+            frame_queue.put((index, frame))
+            progress.queue_fill = frame_queue.qsize() / frame_queue.maxsize
+            frame_count += 1
+    finally:
+        # 每个写图线程一个结束标记
+        for _ in threads:
+            frame_queue.put(None)
+        for t in threads:
+            t.join()
+
+    if errors:
+        raise errors[0]
+    return frame_count
+
+
+# 断点记录文件（位于输出文件夹），记录每段已完成到的源帧序号，重新运行时据此 seek 续提
+MANIFEST_NAME = "extract_manifest.json"
+# 断点记录的最小保存间隔（秒）
+CHECKPOINT_INTERVAL = 2.0
+
+
+class ExtractCheckpoint:
+    """
+    断点记录：提取设置签名 + 分段进度 [{start, end, next, done}] + 累计提取帧数
+    签名（视频路径/大小/修改时间 + 采样与输出设置）不一致时视为新任务，不续提
+    """
+
+    def __init__(self, output_dir, signature, interval=CHECKPOINT_INTERVAL):
+        self.path = os.path.join(output_dir, MANIFEST_NAME)
+        self.signature = signature
+        self.interval = interval
+        self.last_save = 0
+        self.sync = None  # 保存断点前的刷盘回调（帧堆叠输出用）
+
+    def load(self):
+        """读取与当前设置一致的断点记录，没有或不一致时返回 None"""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if state.get("signature") != self.signature:
+            return None
+        return state
+
+    def save(self, segments, frame_count, finished=False, force=False):
+        """节流保存断点；先写临时文件再替换，避免中途崩溃留下损坏的记录"""
+        now = time.time()
+        if not force and now - self.last_save < self.interval:
+            return
+        self.last_save = now
+        if self.sync is not None:
+            self.sync()
+        state = {
+            "signature": self.signature,
+            "segments": segments,
+            "frame_count": frame_count,
+            "finished": finished,
+        }
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+
+def _video_signature(video_path, settings):
+    """断点签名：视频文件身份 + 影响输出的提取设置"""
+    stat = os.stat(video_path)
+    return {
+        "video": os.path.abspath(video_path),
+        "size": stat.st_size,
+        "mtime": stat.st_mtime,
+        "settings": settings,
+    }
+
+
+# 分段并行提取：子进程内用于回报进度的队列、取消事件（由进程池 initializer 注入）
+_segment_progress_queue = None
+_segment_cancel_event = None
+
+
+def _init_segment_worker(progress_queue, cancel_event=None):
+    global _segment_progress_queue, _segment_cancel_event
+    _segment_progress_queue = progress_queue
+    _segment_cancel_event = cancel_event
+
+
+def _extract_segment(segment_id, video_path, output_dir, segment_start, start_frame, end_frame, origin_frame,
+                     step, target_fps, image_format, quality, dedup_method="diff", dedup_threshold=0,
+                     roi=None, transform_options=None):
+    """
+    子进程：独立打开视频并 seek 到分段起点，提取 [start_frame, end_frame) 内的帧
+    文件名使用全局帧序号，因此各分段输出可直接合并在同一目录
+    相似帧过滤在段内进行，每段第一帧总会输出；从断点续提时以段内断点前最后一张输出帧为参照
+    :param segment_start: 段起始帧序号（start_frame 为本次续提的起点）
+    :param roi: 裁剪区域 (x, y, 宽, 高)
+    :param transform_options: 编码前变换设置，见 _make_frame_transform
+    :return: (本段提取的帧数, 本段断点水位, 是否完整结束, 未经队列回报的进度增量)
+    """
+    write_frame = _with_transform(_make_frame_writer(output_dir, image_format, quality),
+                                  _make_frame_transform(**(transform_options or {})))
+    cap = cv2.VideoCapture(video_path)
+    watermark = FrameWatermark(start_frame)
+    frame_count = 0
+    segment = {"start": segment_start, "next": start_frame}
+    # 未回报的增量：[解码帧数, 写盘帧数, 写盘字节数]
+    pending = [0, 0, 0]
+
+    def flush_pending():
+        if _segment_progress_queue is not None:
+            _segment_progress_queue.put((segment_id, *pending, watermark.next_frame))
+        pending[:] = [0, 0, 0]
+
+    def count_decoded(frames):
+        for item in frames:
+            pending[0] += 1
+            if pending[0] >= SEGMENT_PROGRESS_BATCH:
+                flush_pending()
+            yield item
+
+    try:
+        reference = None
+        if dedup_threshold and dedup_threshold > 0 and start_frame > segment_start:
+            reference = _resume_reference(cap, output_dir, image_format, segment)
+            if roi and reference is not None:
+                reference = _crop_roi(reference, roi)
+        frames = _iter_frames(cap, video_path, step, target_fps, start_frame=start_frame,
+                              end_frame=end_frame, origin_frame=origin_frame)
+        if roi:
+            frames = _crop_frames(frames, roi)
+        frames = _track_frames(count_decoded(frames), watermark=watermark, cancel_event=_segment_cancel_event)
+        if dedup_threshold and dedup_threshold > 0:
+            frames = _skip_similar(frames, dedup_method, dedup_threshold, reference)
+        for index, frame in frames:
+            pending[2] += write_frame(index, frame)
+            pending[1] += 1
+            frame_count += 1
+    finally:
+        cap.release()
+    cancelled = _segment_cancel_event is not None and _segment_cancel_event.is_set()
+    # 最后一批增量随返回值带回，避免段结束后队列中的消息晚于结果到达而漏计
+    return frame_count, watermark.next_frame, not cancelled, tuple(pending)
+
+
+def _split_segments(start_frame, stop_frame, segments, open_end=False):
+    """
+    把 [start_frame, stop_frame) 均分为 segments 段
+    :param open_end: 为 True 时最后一段不设结束帧，一直读到视频末尾（帧数属性可能不准）
+    :return: [(段起始帧, 段结束帧或None), ...]
+    """
+    length = stop_frame - start_frame
+    segments = max(1, min(segments, length))
+    bounds = [start_frame + length * i // segments for i in range(segments + 1)]
+    if open_end:
+        bounds[-1] = None
+    return [(bounds[i], bounds[i + 1]) for i in range(segments)]
+
+
+def _extract_parallel(video_path, output_dir, segments, origin_frame, step, target_fps, image_format, quality,
+                      dedup_method="diff", dedup_threshold=0, roi=None, transform_options=None,
+                      progress=None, cancel_event=None, on_tick=None):
+    """
+    分段并行提取：每段在独立进程中 seek 到断点处解码写盘
+    :param segments: 分段进度列表 [{start, end, next, done}]，运行中原地更新 next/done
+    :param origin_frame: 整体采样起点帧序号
+    :param roi: 裁剪区域，transform_options: 编码前变换设置，在子进程中执行
+    :param progress: ExtractProgress，汇总各子进程回报的进度，在调用线程中回调
+    :param cancel_event: 取消事件（threading.Event），置位后通知所有子进程停止
+    :param on_tick: 每轮汇总进度后调用（用于保存断点）
+    :return: 本次提取的总帧数
+    """
+    todo = [i for i, seg in enumerate(segments) if not seg["done"]]
+    if not todo:
+        return 0
+    # 统一使用 spawn 启动子进程：避免在多线程的 GUI 进程中 fork，与 Windows 行为一致
+    mp_context = multiprocessing.get_context("spawn")
+    progress_queue = mp_context.Queue()
+    worker_cancel = mp_context.Event()
+    frame_count = 0
+    with ProcessPoolExecutor(max_workers=len(todo), mp_context=mp_context, initializer=_init_segment_worker,
+                             initargs=(progress_queue, worker_cancel)) as executor:
+        futures = {executor.submit(_extract_segment, i, video_path, output_dir, segments[i]["start"],
+                                   segments[i]["next"],
+                                   segments[i]["end"], origin_frame, step, target_fps, image_format, quality,
+                                   dedup_method, dedup_threshold, roi, transform_options): i
+                   for i in todo}
+        pending = set(futures)
+        while pending:
+            finished, pending = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+            if cancel_event is not None and cancel_event.is_set():
+                worker_cancel.set()
+            # 汇总各子进程回报的进度
+            while True:
+                try:
+                    segment_id, decoded, written, nbytes, next_frame = progress_queue.get_nowait()
+                except queue.Empty:
+                    break
+                progress.add_decoded(decoded)
+                progress.add_written(written, nbytes)
+                segments[segment_id]["next"] = max(segments[segment_id]["next"], next_frame)
+            for future in finished:
+                # 子进程异常在此抛出
+                count, next_frame, completed, (decoded, written, nbytes) = future.result()
+                progress.add_decoded(decoded)
+                progress.add_written(written, nbytes)
+                segment = segments[futures[future]]
+                segment["next"] = max(segment["next"], next_frame)
+                segment["done"] = completed
+                frame_count += count
+            progress.report()
+            if on_tick is not None:
+                on_tick()
+    progress_queue.close()
+    return frame_count
+
+
+def target_script_fun(video_path,output_dir,workers=DEFAULT_WORKERS,
+                      step=1,target_fps=0,start_sec=0,end_sec=0,keyframes_only=False,
+                      image_format="png",quality=None,processes=0,progress_callback=None,
+                      dedup_method="diff",dedup_threshold=0,resume=False,cancel_event=None,
+                      resize=None,interpolation="area",grayscale=False,roi=None):
+    """
+    视频帧提取，输出文件名中的序号为源视频帧序号
+    :param video_path: 视频文件路径
+    :param output_dir: 输出文件夹
+    :param workers: 写图线程数，<=1 时按原串行方式逐帧解码写盘
+    :param step: 每隔 N 帧取一帧
+    :param target_fps: 输出帧率（0 表示原帧率）
+    :param start_sec: 起始时间（秒）
+    :param end_sec: 结束时间（秒，0 表示到视频末尾）
+    :param keyframes_only: 仅提取关键帧
+    :param image_format: 输出格式（png/jpg/webp/npy），memmap 表示写入单个帧堆叠文件
+    :param quality: png 压缩级别(0-9) / jpg、webp 质量(0-100)，None 为默认值
+    :param processes: 分段并行的进程数，>1 时把视频切段后多进程同时解码（此时 workers 不生效）
+    :param progress_callback: 进度回调 callback(stats)，stats 字段见 ExtractProgress，每秒最多约4次
+    :param dedup_method: 相似帧比较方式（diff/phash）
+    :param dedup_threshold: 相似帧阈值，与上一张输出帧变化不超过该值的帧跳过不写，0 表示不过滤
+    :param resume: 断点续提，输出文件夹中有相同设置的断点记录时，从记录处 seek 继续
+    :param cancel_event: 取消事件（threading.Event），置位后尽快停止并保存断点
+    :param resize: 输出尺寸 (宽, 高)，其中一项为 0 时按原比例缩放，None 表示不缩放
+    :param interpolation: 缩放插值方式，见 INTERPOLATIONS
+    :param grayscale: 输出单通道灰度图
+    :param roi: 只输出裁剪区域 (x, y, 宽, 高)，None 表示整个画面
+    :return: (是否成功, 提示信息)
+    """
     print(f"=== 接收到的参数 ===")
     print(f"文件路径：{video_path}")
     print(f"文件夹路径：{output_dir}")
 
     # 此处替换为你的业务逻辑（示例：视频帧提取）
     try:
+        # 裁剪在解码阶段完成（切片），缩放/灰度在写图阶段完成
+        roi = [int(v) for v in roi] if roi else None
+        resize = [int(v or 0) for v in resize] if resize and any(resize) else None
+        transform_options = {"resize": resize, "interpolation": interpolation, "grayscale": bool(grayscale)}
+        transform = _make_frame_transform(**transform_options)
         if not os.path.exists(output_dir):
             os.makedirs(output_dir)
         cap = cv2.VideoCapture(video_path)
-        frame_count = 0
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
-            frame_path = os.path.join(output_dir, f"frame_{frame_count:06d}.png")
-            cv2.imwrite(frame_path, frame)
-            frame_count += 1
-        cap.release()
-        return True, f"共提取 {frame_count} 帧图片"
+        if not cap.isOpened():
+            return False, f"无法打开视频文件：{video_path}"
+        try:
+            fps = cap.get(cv2.CAP_PROP_FPS) or 0
+            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+            expected = _expected_frames(total_frames, fps, step, target_fps, start_sec, end_sec)
+            keyframes = None
+            if keyframes_only:
+                # 先扫描一遍关键帧（不解码），进度总量按范围内的关键帧数计算，_iter_frames 复用该列表
+                keyframes = _scan_keyframes(video_path)
+                if fps > 0:
+                    expected = _keyframes_in_range(
+                        keyframes,
+                        int(round(start_sec * fps)) if start_sec and start_sec > 0 else 0,
+                        int(math.ceil(end_sec * fps)) if end_sec and end_sec > 0 else None)
+                else:
+                    expected = len(keyframes)
+            progress = ExtractProgress(expected, progress_callback)
+            # 相似帧过滤时实际输出远少于预估帧数
+            filtered = bool(dedup_threshold and dedup_threshold > 0)
+            # 分段并行需要已知帧率和帧数来切分；关键帧模式本身已是 seek 跳读，帧堆叠需顺序写入
+            parallel = (processes and processes > 1 and fps > 0 and total_frames > 0
+                        and not keyframes_only and image_format != FRAME_STACK_FORMAT)
+
+            # 帧率未知时无法换算帧序号，只能按时间逐帧读取，不支持断点
+            if fps <= 0:
+                frames = _iter_frames(cap, video_path, step, target_fps, start_sec, end_sec, keyframes_only,
+                                      keyframes=keyframes)
+                if roi:
+                    frames = _crop_frames(frames, roi)
+                frames = _track_frames(frames, progress, cancel_event=cancel_event)
+                if dedup_threshold and dedup_threshold > 0:
+                    frames = _skip_similar(frames, dedup_method, dedup_threshold)
+                if image_format == FRAME_STACK_FORMAT:
+                    stack_writer = FrameStackWriter(output_dir, fps, _stack_capacity(expected, filtered))
+                    try:
+                        _extract_serial(frames, _with_transform(stack_writer, transform), progress)
+                    finally:
+                        frame_count = stack_writer.close()
+                else:
+                    write_frame = _with_transform(_make_frame_writer(output_dir, image_format, quality), transform)
+                    if workers and workers > 1:
+                        frame_count = _extract_pipelined(frames, write_frame, workers, progress)
+                    else:
+                        frame_count = _extract_serial(frames, write_frame, progress)
+                progress.report(force=True)
+                if cancel_event is not None and cancel_event.is_set():
+                    return False, f"提取已取消，已提取 {frame_count} 帧"
+                return True, f"共提取 {frame_count} 帧图片，{progress.summary()}"
+
+            start_frame = int(round(start_sec * fps)) if start_sec and start_sec > 0 else 0
+            end_frame = int(math.ceil(end_sec * fps)) if end_sec and end_sec > 0 else None
+            settings = {
+                "step": step, "target_fps": target_fps, "start_sec": start_sec, "end_sec": end_sec,
+                "keyframes_only": keyframes_only, "image_format": image_format, "quality": quality,
+                "dedup_method": dedup_method, "dedup_threshold": dedup_threshold,
+                "processes": processes if parallel else 1,
+                "roi": roi, **transform_options,
+            }
+            checkpoint = ExtractCheckpoint(output_dir, _video_signature(video_path, settings))
+            state = checkpoint.load() if resume else None
+            if state and state["finished"]:
+                return True, f"断点记录显示已全部提取完成，共 {state['frame_count']} 帧，无需重复提取"
+            if state:
+                segments, previous_count = state["segments"], state["frame_count"]
+                # 进度只统计剩余部分
+                stop_frame = end_frame if end_frame is not None else total_frames
+                remaining = sum(max(0, (seg["end"] if seg["end"] is not None else stop_frame) - seg["next"])
+                                for seg in segments if not seg["done"])
+                if keyframes is not None:
+                    progress.total = sum(_keyframes_in_range(keyframes, seg["next"], seg["end"])
+                                         for seg in segments if not seg["done"])
+                elif stop_frame > start_frame:
+                    progress.total = int(math.ceil(expected * remaining / (stop_frame - start_frame)))
+            else:
+                previous_count = 0
+                if parallel:
+                    stop_frame = end_frame if end_frame is not None else total_frames
+                    bounds = _split_segments(start_frame, max(stop_frame, start_frame + 1), processes,
+                                             open_end=end_frame is None)
+                else:
+                    bounds = [(start_frame, end_frame)]
+                segments = [{"start": a, "end": b, "next": a, "done": False} for a, b in bounds]
+
+            def frame_total():
+                return previous_count + progress.written
+
+            def save_checkpoint(finished=False, force=False):
+                checkpoint.save(segments, frame_total(), finished, force)
+
+            completed = False
+            try:
+                if parallel:
+                    cap.release()
+                    _extract_parallel(video_path, output_dir, segments, start_frame, step, target_fps,
+                                      image_format, quality, dedup_method, dedup_threshold, roi,
+                                      transform_options, progress, cancel_event, save_checkpoint)
+                    completed = all(seg["done"] for seg in segments)
+                    mode = f"图片（{len(segments)} 进程分段并行）"
+                else:
+                    segment = segments[0]
+                    watermark = FrameWatermark(segment["next"])
+                    reference = None
+                    if dedup_threshold and dedup_threshold > 0 and segment["next"] > segment["start"]:
+                        reference = _resume_reference(cap, output_dir, image_format, segment)
+                        if roi and reference is not None:
+                            reference = _crop_roi(reference, roi)
+
+                    def on_tick():
+                        segment["next"] = watermark.next_frame
+                        save_checkpoint()
+
+                    frames = _iter_frames(cap, video_path, step, target_fps, keyframes_only=keyframes_only,
+                                          start_frame=segment["next"], end_frame=segment["end"],
+                                          origin_frame=segment["start"], keyframes=keyframes)
+                    if roi:
+                        frames = _crop_frames(frames, roi)
+                    frames = _track_frames(frames, progress, watermark, cancel_event, on_tick)
+                    if dedup_threshold and dedup_threshold > 0:
+                        frames = _skip_similar(frames, dedup_method, dedup_threshold, reference)
+                    if image_format == FRAME_STACK_FORMAT:
+                        # 写入帧堆叠只是内存拷贝，无需写图线程
+                        stack_writer = FrameStackWriter(output_dir, fps, _stack_capacity(expected, filtered),
+                                                        resume=state is not None)
+                        checkpoint.sync = stack_writer.sync
+                        try:
+                            _extract_serial(frames, _with_transform(stack_writer, transform), progress)
+                        finally:
+                            stack_writer.close()
+                        mode = f"，已写入帧堆叠文件 {FRAME_STACK_DATA}"
+                    else:
+                        write_frame = _with_transform(_make_frame_writer(output_dir, image_format, quality),
+                                                      transform)
+                        if workers and workers > 1:
+                            _extract_pipelined(frames, write_frame, workers, progress, watermark)
+                        else:
+                            _extract_serial(frames, write_frame, progress)
+                        mode = "图片"
+                    segment["next"] = watermark.next_frame
+                    segment["done"] = completed = not (cancel_event is not None and cancel_event.is_set())
+            finally:
+                # 无论完成、取消还是出错都保存断点，下次可续提
+                save_checkpoint(finished=completed, force=True)
+        finally:
+            cap.release()
+        progress.report(force=True)
+        resumed = f"（断点续提，本次 {progress.written} 帧）" if previous_count else ""
+        if not completed:
+            return False, (f"提取已取消：累计已提取 {frame_total()} 帧{resumed}，断点已保存，"
+                           f"勾选断点续提后重新开始即可继续")
+        return True, f"共提取 {frame_total()} 帧{mode}{resumed}，{progress.summary()}"
     except Exception as e:
         return False,f"业务逻辑执行出错：{str(e)}"
 
+# 批量提取：选择文件夹时按扩展名筛选视频文件
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv")
+# 批量提取默认最多同时运行的任务数
+BATCH_MAX_JOBS = 4
+# 批量提取的任务状态
+JOB_PENDING = "等待中"
+JOB_RUNNING = "提取中"
+JOB_DONE = "完成"
+JOB_FAILED = "失败"
+JOB_CANCELLED = "已取消"
+
+
+def list_videos(folder):
+    """列出文件夹（不含子文件夹）中的视频文件，按文件名排序"""
+    with os.scandir(folder) as it:
+        paths = [entry.path for entry in it
+                 if entry.is_file() and os.path.splitext(entry.name)[1].lower() in VIDEO_EXTENSIONS]
+    return sorted(paths)
+
+
+def _is_rotational_disk(path):
+    """
+    判断路径所在磁盘是否为机械硬盘（仅 Linux 可判断，其它系统返回 None）
+    """
+    try:
+        dev = os.stat(path).st_dev
+        block = f"/sys/dev/block/{os.major(dev)}:{os.minor(dev)}"
+        for queue_dir in (os.path.join(block, "queue"), os.path.join(block, "..", "queue")):
+            flag = os.path.join(queue_dir, "rotational")
+            if os.path.exists(flag):
+                with open(flag) as f:
+                    return f.read().strip() == "1"
+    except (OSError, AttributeError):
+        pass
+    return None
+
+
+def default_batch_jobs(output_dir):
+    """
+    批量提取默认并行任务数：每个任务占用一个解码线程和若干写图线程，按 CPU 核数的一半计算；
+    输出到机械硬盘时最多 2 个，多路顺序写会让磁头来回寻道，反而更慢
+    """
+    jobs = max(1, min(BATCH_MAX_JOBS, (os.cpu_count() or 1) // 2))
+    if _is_rotational_disk(output_dir):
+        jobs = min(jobs, 2)
+    return jobs
+
+
+def _batch_output_dirs(video_paths, output_dir):
+    """每个视频输出到以文件名命名的子文件夹，重名时追加扩展名区分（结果稳定，便于断点续提）"""
+    stems = [os.path.splitext(os.path.basename(p))[0] for p in video_paths]
+    dirs = []
+    for path, stem in zip(video_paths, stems):
+        name = stem
+        if stems.count(stem) > 1:
+            name = f"{stem}_{os.path.splitext(path)[1].lstrip('.')}"
+        dirs.append(os.path.join(output_dir, name))
+    return dirs
+
+
+def _probe_expected_frames(video_path, step=1, target_fps=0, start_sec=0, end_sec=0):
+    """只读取视频头信息估算输出帧数（不解码），用于批量进度的总量"""
+    cap = cv2.VideoCapture(video_path)
+    try:
+        fps = cap.get(cv2.CAP_PROP_FPS) or 0
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+    finally:
+        cap.release()
+    return _expected_frames(total_frames, fps, step, target_fps, start_sec, end_sec)
+
+
+class BatchProgress(ExtractProgress):
+    """
+    批量提取进度：汇总各任务最新的进度统计，字段与 ExtractProgress 相同，
+    另含 jobs_total 任务总数、jobs_finished 已结束任务数；未开始的任务按预估帧数计入 total
+    """
+
+    def __init__(self, totals, callback=None, interval=PROGRESS_INTERVAL):
+        super().__init__(sum(totals), callback, interval)
+        self.totals = list(totals)
+        self.jobs = {}  # 任务序号 -> 该任务最新的进度统计
+        self.finished = 0
+
+    def update(self, job, stats):
+        with self.lock:
+            self.jobs[job] = stats
+        self.report()
+
+    def finish(self, job):
+        with self.lock:
+            if job not in self.jobs:
+                # 没有回报过进度（如断点记录显示已完成）的任务不再计入总量
+                self.totals[job] = 0
+            self.finished += 1
+        self.report(force=True)
+
+    def snapshot(self):
+        elapsed = max(time.time() - self.start_time, 1e-6)
+        with self.lock:
+            jobs, finished = dict(self.jobs), self.finished
+        decoded = sum(stats["done"] for stats in jobs.values())
+        written = sum(stats["written"] for stats in jobs.values())
+        nbytes = sum(stats["bytes_written"] for stats in jobs.values())
+        total = sum(jobs[i]["total"] if i in jobs else expected for i, expected in enumerate(self.totals))
+        decode_fps = decoded / elapsed
+        eta = None
+        if total and decode_fps > 0:
+            eta = max(0.0, (total - decoded) / decode_fps)
+        return {
+            "done": decoded,
+            "written": written,
+            "total": total,
+            "elapsed": elapsed,
+            "decode_fps": decode_fps,
+            "write_mbps": nbytes / elapsed / (1024 * 1024),
+            "eta": eta,
+            "queue_fill": None,
+            "bytes_written": nbytes,
+            "jobs_total": len(self.totals),
+            "jobs_finished": finished,
+        }
+
+
+def extract_batch(video_paths, output_dir, jobs=0, job_callback=None, progress_callback=None,
+                  cancel_event=None, **options):
+    """
+    批量视频帧提取：多个视频排队，由有界线程池同时运行若干个 target_script_fun
+    每个视频输出到 output_dir 下以视频文件名命名的子文件夹（各自保存断点，可整体续提）
+    :param video_paths: 视频文件路径列表
+    :param jobs: 同时运行的任务数，0 表示按 CPU 核数与输出磁盘类型自动选择（见 default_batch_jobs）
+    :param job_callback: 任务状态回调 callback(任务序号, 状态, 提示信息)，状态见 JOB_*
+    :param progress_callback: 整体进度回调 callback(stats)，字段见 BatchProgress
+    :param cancel_event: 取消事件，置位后运行中的任务保存断点结束，未开始的任务不再运行
+    :param options: 传给 target_script_fun 的提取设置；workers/processes 为总量，由同时运行的任务平分
+    :return: (是否全部成功, 汇总信息)
+    """
+    if not video_paths:
+        return False, "没有需要提取的视频"
+    jobs = jobs if jobs and jobs > 0 else default_batch_jobs(output_dir)
+    jobs = min(jobs, len(video_paths))
+    options = dict(options)
+    options["workers"] = max(1, int(options.get("workers", DEFAULT_WORKERS) or 1) // jobs)
+    if options.get("processes"):
+        options["processes"] = max(1, int(options["processes"]) // jobs)
+    output_dirs = _batch_output_dirs(video_paths, output_dir)
+    sample_keys = ("step", "target_fps", "start_sec", "end_sec")
+    totals = [_probe_expected_frames(path, **{k: options[k] for k in sample_keys if k in options})
+              for path in video_paths]
+    progress = BatchProgress(totals, progress_callback)
+
+    def notify(index, status, msg=""):
+        if job_callback:
+            job_callback(index, status, msg)
+
+    for index in range(len(video_paths)):
+        notify(index, JOB_PENDING)
+
+    def run_job(index):
+        if cancel_event is not None and cancel_event.is_set():
+            notify(index, JOB_CANCELLED, "未开始")
+            return JOB_CANCELLED
+        notify(index, JOB_RUNNING)
+        ok, msg = target_script_fun(video_paths[index], output_dirs[index],
+                                    progress_callback=lambda stats: progress.update(index, stats),
+                                    cancel_event=cancel_event, **options)
+        if ok:
+            status = JOB_DONE
+        elif cancel_event is not None and cancel_event.is_set():
+            status = JOB_CANCELLED
+        else:
+            status = JOB_FAILED
+        progress.finish(index)
+        notify(index, status, msg)
+        return status
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        statuses = list(executor.map(run_job, range(len(video_paths))))
+
+    stats = progress.snapshot()
+    counts = {status: statuses.count(status) for status in (JOB_DONE, JOB_FAILED, JOB_CANCELLED)}
+    summary = (f"共 {len(video_paths)} 个视频（{jobs} 个任务并行）：完成 {counts[JOB_DONE]}，"
+               f"失败 {counts[JOB_FAILED]}，取消 {counts[JOB_CANCELLED]}；本次共提取 {stats['written']} 帧，"
+               f"{progress.summary()}")
+    return counts[JOB_DONE] == len(video_paths), summary
+
+
 if __name__ == "__main__":
-    target_script_fun('','')
\ No newline at end of file
+    target_script_fun('','')
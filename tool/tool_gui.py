@@ -1,14 +1,56 @@
 import sys
 import os
+import re
+import time
 import datetime
 import threading
+import multiprocessing
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QHBoxLayout, QVBoxLayout,
     QPushButton, QStackedWidget, QLabel, QFileDialog, QMessageBox,
-    QTextEdit, QGroupBox, QSizePolicy, QCheckBox, QLineEdit, QGridLayout
+    QTextEdit, QGroupBox, QSizePolicy, QCheckBox, QLineEdit, QGridLayout, QComboBox,
+    QProgressBar, QTableWidget, QTableWidgetItem, QHeaderView, QAbstractItemView,
+    QTreeWidget, QTreeWidgetItem, QTabWidget
 )
 from PyQt5.QtCore import Qt, QThread, pyqtSignal, QMetaObject, Q_ARG, QTimer
-from PyQt5.QtGui import QFont, QColor, QIntValidator
+from PyQt5.QtGui import QFont, QColor, QIntValidator, QDoubleValidator
+
+# 默认写图线程数（与 target_script.DEFAULT_WORKERS 保持一致）
+DEFAULT_WORKERS = min(8, os.cpu_count() or 1)
+
+# 视频帧输出格式（下拉框文字, target_script.OUTPUT_FORMATS 中的格式名）
+VIDEO_OUTPUT_FORMATS = [
+    ("PNG（无损）", "png"),
+    ("JPG（体积小、速度快）", "jpg"),
+    ("WEBP（体积最小）", "webp"),
+    ("NPY（原始数组）", "npy"),
+    ("MEMMAP（单文件帧堆叠）", "memmap"),
+]
+
+# 缩放插值方式（下拉框文字, target_script.INTERPOLATIONS 中的名称）
+VIDEO_INTERPOLATIONS = [
+    ("区域（缩小推荐）", "area"),
+    ("双线性（快）", "linear"),
+    ("双三次（放大推荐）", "cubic"),
+    ("最近邻（最快）", "nearest"),
+    ("Lanczos（最清晰）", "lanczos"),
+]
+
+# 图片去重哈希算法（下拉框文字, duplicates_photo.HASH_ALGORITHMS 中的算法名）
+DEDUP_HASH_ALGORITHMS = [
+    ("pHash（感知哈希）", "phash"),
+    ("dHash（差值哈希，快）", "dhash"),
+    ("aHash（均值哈希，最快）", "ahash"),
+    ("wHash（小波哈希）", "whash"),
+    ("colorhash（颜色分布）", "colorhash"),
+]
+
+# 重复组保留规则（下拉框文字, duplicates_photo.KEEPER_RULES 中的规则名）
+DEDUP_KEEPER_RULES = [
+    ("最高分辨率", "resolution"),
+    ("最大文件", "size"),
+    ("最早修改", "oldest"),
+]
 
 # ====================== 统一样式常量（便于维护） ======================
 PAGE_STYLE = "background-color: #ECF0F1; color: black;"  # 页面基础样式
@@ -61,7 +103,10 @@ class VideoFrame2PicPage(QWidget):
     def __init__(self):
         super().__init__()
         self.selected_video = ""
+        self.selected_videos = []  # 批量提取时选中的多个视频
+        self.batch_videos = []  # 当前批量任务的视频列表快照（运行期间不随选择变化）
         self.selected_output = ""
+        self.extract_thread = None
         self.init_ui()
 
     def init_ui(self):
@@ -86,8 +131,8 @@ class VideoFrame2PicPage(QWidget):
 
         # 功能介绍（统一格式）
         page_desc = QLabel("""
-        功能说明：将视频文件按帧提取为图片格式（PNG），支持主流视频格式（MP4/AVI/MOV/MKV）。
-        使用步骤：1.选择视频文件 → 2.选择输出文件夹 → 3.点击开始提取 → 4.查看提取日志
+        功能说明：将视频文件按帧提取为图片（PNG/JPG/WEBP/NPY），支持主流视频格式（MP4/AVI/MOV/MKV），可按帧间隔/帧率/时间段/关键帧采样，可缩放/灰度/裁剪后输出。
+        使用步骤：1.选择视频文件（可批量选择或选择文件夹） → 2.选择输出文件夹 → 3.点击开始提取 → 4.查看提取日志
         """)
         page_desc.setFont(DESC_FONT)
         page_desc.setWordWrap(True)
@@ -144,6 +189,41 @@ class VideoFrame2PicPage(QWidget):
         self.btn_video.clicked.connect(self.select_video)
         video_row_layout.addWidget(self.btn_video)
 
+        # 批量提取：多选视频文件 / 选择视频文件夹
+        self.btn_videos = QPushButton("批量选择视频")
+        self.btn_videos.setFixedSize(120, 35)
+        self.btn_videos.setFont(BUTTON_FONT)
+        self.btn_videos.setStyleSheet("""
+            QPushButton {
+                background-color: #3498DB;
+                color: white;
+                border: none;
+                border-radius: 5px;
+            }
+            QPushButton:hover {
+                background-color: #2980B9;
+            }
+        """)
+        self.btn_videos.clicked.connect(self.select_videos)
+        video_row_layout.addWidget(self.btn_videos)
+
+        self.btn_video_folder = QPushButton("选择视频文件夹")
+        self.btn_video_folder.setFixedSize(120, 35)
+        self.btn_video_folder.setFont(BUTTON_FONT)
+        self.btn_video_folder.setStyleSheet("""
+            QPushButton {
+                background-color: #3498DB;
+                color: white;
+                border: none;
+                border-radius: 5px;
+            }
+            QPushButton:hover {
+                background-color: #2980B9;
+            }
+        """)
+        self.btn_video_folder.clicked.connect(self.select_video_folder)
+        video_row_layout.addWidget(self.btn_video_folder)
+
         self.lbl_video = QLabel("未选择视频文件")
         self.lbl_video.setFont(DESC_FONT)
         self.lbl_video.setStyleSheet("color: black;")
@@ -186,14 +266,239 @@ class VideoFrame2PicPage(QWidget):
 
         file_layout.addWidget(output_row)
 
+        # 写图线程数输入行
+        workers_row = QWidget()
+        workers_row_layout = QHBoxLayout(workers_row)
+        workers_row_layout.setSpacing(10)
+        workers_row_layout.setAlignment(Qt.AlignCenter)
+        workers_row_layout.setContentsMargins(0, 0, 0, 0)
+
+        lbl_workers = QLabel("写图线程数：")
+        lbl_workers.setFont(DESC_FONT)
+        workers_row_layout.addWidget(lbl_workers)
+
+        self.le_workers = QLineEdit(str(DEFAULT_WORKERS))
+        self.le_workers.setFixedWidth(60)
+        self.le_workers.setFont(DESC_FONT)
+        self.le_workers.setValidator(QIntValidator(1, 64))
+        workers_row_layout.addWidget(self.le_workers)
+
+        lbl_processes = QLabel("分段并行进程数：")
+        lbl_processes.setFont(DESC_FONT)
+        workers_row_layout.addWidget(lbl_processes)
+
+        self.le_processes = QLineEdit("1")
+        self.le_processes.setFixedWidth(60)
+        self.le_processes.setFont(DESC_FONT)
+        self.le_processes.setValidator(QIntValidator(1, 128))
+        workers_row_layout.addWidget(self.le_processes)
+
+        lbl_jobs = QLabel("批量并行任务数：")
+        lbl_jobs.setFont(DESC_FONT)
+        workers_row_layout.addWidget(lbl_jobs)
+
+        self.le_jobs = QLineEdit()
+        self.le_jobs.setFixedWidth(60)
+        self.le_jobs.setFont(DESC_FONT)
+        self.le_jobs.setPlaceholderText("自动")
+        self.le_jobs.setValidator(QIntValidator(1, 64))
+        workers_row_layout.addWidget(self.le_jobs)
+
+        tip_workers = QLabel("线程：解码与写盘并行 | 进程>1：切段多进程同时解码 | 批量时线程/进程数由各任务平分")
+        tip_workers.setFont(QFont("微软雅黑", 9))
+        tip_workers.setStyleSheet("color: #666666;")
+        workers_row_layout.addWidget(tip_workers)
+
+        file_layout.addWidget(workers_row)
+
+        # 采样设置行：每N帧 / 输出帧率 / 起止时间 / 仅关键帧
+        sample_row = QWidget()
+        sample_row_layout = QHBoxLayout(sample_row)
+        sample_row_layout.setSpacing(10)
+        sample_row_layout.setAlignment(Qt.AlignCenter)
+        sample_row_layout.setContentsMargins(0, 0, 0, 0)
+
+        lbl_step = QLabel("每N帧取1帧：")
+        lbl_step.setFont(DESC_FONT)
+        sample_row_layout.addWidget(lbl_step)
+        self.le_step = QLineEdit("1")
+        self.le_step.setFixedWidth(50)
+        self.le_step.setFont(DESC_FONT)
+        self.le_step.setValidator(QIntValidator(1, 100000))
+        sample_row_layout.addWidget(self.le_step)
+
+        lbl_fps = QLabel("输出帧率：")
+        lbl_fps.setFont(DESC_FONT)
+        sample_row_layout.addWidget(lbl_fps)
+        self.le_fps = QLineEdit()
+        self.le_fps.setFixedWidth(50)
+        self.le_fps.setFont(DESC_FONT)
+        self.le_fps.setPlaceholderText("原帧率")
+        self.le_fps.setValidator(QDoubleValidator(0, 1000, 3))
+        sample_row_layout.addWidget(self.le_fps)
+
+        lbl_start = QLabel("起始(秒)：")
+        lbl_start.setFont(DESC_FONT)
+        sample_row_layout.addWidget(lbl_start)
+        self.le_start = QLineEdit()
+        self.le_start.setFixedWidth(60)
+        self.le_start.setFont(DESC_FONT)
+        self.le_start.setPlaceholderText("开头")
+        self.le_start.setValidator(QDoubleValidator(0, 1e7, 3))
+        sample_row_layout.addWidget(self.le_start)
+
+        lbl_end = QLabel("结束(秒)：")
+        lbl_end.setFont(DESC_FONT)
+        sample_row_layout.addWidget(lbl_end)
+        self.le_end = QLineEdit()
+        self.le_end.setFixedWidth(60)
+        self.le_end.setFont(DESC_FONT)
+        self.le_end.setPlaceholderText("末尾")
+        self.le_end.setValidator(QDoubleValidator(0, 1e7, 3))
+        sample_row_layout.addWidget(self.le_end)
+
+        self.cb_keyframes = QCheckBox("仅关键帧")
+        self.cb_keyframes.setFont(DESC_FONT)
+        self.cb_keyframes.setStyleSheet("color: black;")
+        sample_row_layout.addWidget(self.cb_keyframes)
+
+        file_layout.addWidget(sample_row)
+
+        # 输出格式行：格式 + 压缩级别/质量
+        format_row = QWidget()
+        format_row_layout = QHBoxLayout(format_row)
+        format_row_layout.setSpacing(10)
+        format_row_layout.setAlignment(Qt.AlignCenter)
+        format_row_layout.setContentsMargins(0, 0, 0, 0)
+
+        lbl_format = QLabel("输出格式：")
+        lbl_format.setFont(DESC_FONT)
+        format_row_layout.addWidget(lbl_format)
+        self.combo_format = QComboBox()
+        self.combo_format.setFixedWidth(160)
+        self.combo_format.setFont(DESC_FONT)
+        for text, fmt in VIDEO_OUTPUT_FORMATS:
+            self.combo_format.addItem(text, fmt)
+        format_row_layout.addWidget(self.combo_format)
+
+        lbl_quality = QLabel("压缩级别/质量：")
+        lbl_quality.setFont(DESC_FONT)
+        format_row_layout.addWidget(lbl_quality)
+        self.le_quality = QLineEdit()
+        self.le_quality.setFixedWidth(60)
+        self.le_quality.setFont(DESC_FONT)
+        self.le_quality.setPlaceholderText("默认")
+        self.le_quality.setValidator(QIntValidator(0, 100))
+        format_row_layout.addWidget(self.le_quality)
+
+        tip_quality = QLabel("PNG：0最快~9最小 | JPG/WEBP：质量0~100")
+        tip_quality.setFont(QFont("微软雅黑", 9))
+        tip_quality.setStyleSheet("color: #666666;")
+        format_row_layout.addWidget(tip_quality)
+
+        file_layout.addWidget(format_row)
+
+        # 画面处理行：缩放 / 灰度 / 裁剪，在编码前完成，输出越小编码写盘越快
+        transform_row = QWidget()
+        transform_row_layout = QHBoxLayout(transform_row)
+        transform_row_layout.setSpacing(10)
+        transform_row_layout.setAlignment(Qt.AlignCenter)
+        transform_row_layout.setContentsMargins(0, 0, 0, 0)
+
+        lbl_resize = QLabel("输出宽x高：")
+        lbl_resize.setFont(DESC_FONT)
+        transform_row_layout.addWidget(lbl_resize)
+        self.le_resize_w = QLineEdit()
+        self.le_resize_w.setFixedWidth(60)
+        self.le_resize_w.setFont(DESC_FONT)
+        self.le_resize_w.setPlaceholderText("原宽")
+        self.le_resize_w.setValidator(QIntValidator(0, 16384))
+        transform_row_layout.addWidget(self.le_resize_w)
+        self.le_resize_h = QLineEdit()
+        self.le_resize_h.setFixedWidth(60)
+        self.le_resize_h.setFont(DESC_FONT)
+        self.le_resize_h.setPlaceholderText("原高")
+        self.le_resize_h.setValidator(QIntValidator(0, 16384))
+        transform_row_layout.addWidget(self.le_resize_h)
+
+        self.combo_interp = QComboBox()
+        self.combo_interp.setFixedWidth(150)
+        self.combo_interp.setFont(DESC_FONT)
+        for text, name in VIDEO_INTERPOLATIONS:
+            self.combo_interp.addItem(text, name)
+        transform_row_layout.addWidget(self.combo_interp)
+
+        self.cb_grayscale = QCheckBox("灰度")
+        self.cb_grayscale.setFont(DESC_FONT)
+        self.cb_grayscale.setStyleSheet("color: black;")
+        transform_row_layout.addWidget(self.cb_grayscale)
+
+        lbl_roi = QLabel("裁剪区域：")
+        lbl_roi.setFont(DESC_FONT)
+        transform_row_layout.addWidget(lbl_roi)
+        self.le_roi = QLineEdit()
+        self.le_roi.setFixedWidth(130)
+        self.le_roi.setFont(DESC_FONT)
+        self.le_roi.setPlaceholderText("x,y,宽,高")
+        transform_row_layout.addWidget(self.le_roi)
+
+        tip_transform = QLabel("宽/高只填一项时按比例缩放")
+        tip_transform.setFont(QFont("微软雅黑", 9))
+        tip_transform.setStyleSheet("color: #666666;")
+        transform_row_layout.addWidget(tip_transform)
+
+        file_layout.addWidget(transform_row)
+
+        # 相似帧过滤行：与上一张输出帧比较，变化小的帧不写盘
+        dedup_row = QWidget()
+        dedup_row_layout = QHBoxLayout(dedup_row)
+        dedup_row_layout.setSpacing(10)
+        dedup_row_layout.setAlignment(Qt.AlignCenter)
+        dedup_row_layout.setContentsMargins(0, 0, 0, 0)
+
+        lbl_dedup = QLabel("相似帧过滤：")
+        lbl_dedup.setFont(DESC_FONT)
+        dedup_row_layout.addWidget(lbl_dedup)
+        self.combo_dedup = QComboBox()
+        self.combo_dedup.setFixedWidth(160)
+        self.combo_dedup.setFont(DESC_FONT)
+        self.combo_dedup.addItem("像素差（0~255）", "diff")
+        self.combo_dedup.addItem("感知哈希（0~64）", "phash")
+        dedup_row_layout.addWidget(self.combo_dedup)
+
+        lbl_dedup_threshold = QLabel("阈值：")
+        lbl_dedup_threshold.setFont(DESC_FONT)
+        dedup_row_layout.addWidget(lbl_dedup_threshold)
+        self.le_dedup_threshold = QLineEdit()
+        self.le_dedup_threshold.setFixedWidth(60)
+        self.le_dedup_threshold.setFont(DESC_FONT)
+        self.le_dedup_threshold.setPlaceholderText("不过滤")
+        self.le_dedup_threshold.setValidator(QDoubleValidator(0, 255, 2))
+        dedup_row_layout.addWidget(self.le_dedup_threshold)
+
+        tip_dedup = QLabel("与上一张输出帧的变化不超过阈值则跳过，适合录屏/监控")
+        tip_dedup.setFont(QFont("微软雅黑", 9))
+        tip_dedup.setStyleSheet("color: #666666;")
+        dedup_row_layout.addWidget(tip_dedup)
+
+        file_layout.addWidget(dedup_row)
+
         main_layout.addWidget(file_group)
 
         # 3. 提取操作区域（按钮居中）
         btn_row = QWidget()
         btn_row_layout = QHBoxLayout(btn_row)
+        btn_row_layout.setSpacing(20)
         btn_row_layout.setAlignment(Qt.AlignCenter)
         btn_row_layout.setContentsMargins(0, 0, 0, 0)
 
+        # 断点续提：输出文件夹中有相同设置的断点记录时从断点处继续
+        # 默认不勾选：与原来一样每次重新提取，需要续提时（如取消后）手动勾选
+        self.cb_resume = QCheckBox("断点续提")
+        self.cb_resume.setFont(DESC_FONT)
+        self.cb_resume.setStyleSheet("color: black;")
+        btn_row_layout.addWidget(self.cb_resume)
+
         self.btn_run = QPushButton("开始提取")
         self.btn_run.setFixedSize(120, 40)
         self.btn_run.setFont(QFont("微软雅黑", 12, QFont.Bold))
@@ -218,8 +523,74 @@ class VideoFrame2PicPage(QWidget):
         #点击执行哪个方法
         self.btn_run.clicked.connect(self.run_extract)
         btn_row_layout.addWidget(self.btn_run)
+
+        # 停止提取按钮：当前进度写入断点记录后结束
+        self.btn_stop = QPushButton("停止提取")
+        self.btn_stop.setFixedSize(120, 40)
+        self.btn_stop.setFont(QFont("微软雅黑", 12, QFont.Bold))
+        self.btn_stop.setStyleSheet("""
+            QPushButton {
+                background-color: #F44336;
+                color: white;
+                border: none;
+                border-radius: 5px;
+            }
+            QPushButton:hover {
+                background-color: #D32F2F;
+            }
+            QPushButton:disabled {
+                background-color: #95A5A6;
+                color: #EEEEEE;
+                border: 1px solid #7F8C8D;
+                cursor: not-allowed;
+            }
+        """)
+        self.btn_stop.clicked.connect(self.stop_extract)
+        self.btn_stop.setDisabled(True)  # 默认禁用
+        btn_row_layout.addWidget(self.btn_stop)
         main_layout.addWidget(btn_row)
 
+        # 进度条 + 速度/剩余时间
+        progress_row = QWidget()
+        progress_row_layout = QHBoxLayout(progress_row)
+        progress_row_layout.setSpacing(10)
+        progress_row_layout.setContentsMargins(0, 0, 0, 0)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setValue(0)
+        self.progress_bar.setFont(DESC_FONT)
+        progress_row_layout.addWidget(self.progress_bar, stretch=1)
+
+        self.lbl_progress = QLabel("")
+        self.lbl_progress.setFont(QFont("微软雅黑", 9))
+        self.lbl_progress.setStyleSheet("color: #666666;")
+        progress_row_layout.addWidget(self.lbl_progress)
+
+        main_layout.addWidget(progress_row)
+
+        # 批量任务列表：每个视频一行，显示状态与结果（仅批量提取时显示）
+        self.job_table = QTableWidget(0, 3)
+        self.job_table.setHorizontalHeaderLabels(["视频", "状态", "结果"])
+        self.job_table.setFont(DESC_FONT)
+        self.job_table.setStyleSheet("""
+            QTableWidget {
+                background-color: white;
+                color: black;
+                border: 1px solid #DDDDDD;
+                border-radius: 5px;
+            }
+        """)
+        self.job_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.job_table.verticalHeader().setVisible(False)
+        header = self.job_table.horizontalHeader()
+        header.setSectionResizeMode(0, QHeaderView.ResizeToContents)
+        header.setSectionResizeMode(1, QHeaderView.ResizeToContents)
+        header.setSectionResizeMode(2, QHeaderView.Stretch)
+        self.job_table.setMinimumHeight(150)
+        self.job_table.setVisible(False)
+        main_layout.addWidget(self.job_table, stretch=1)
+
         # 4. 日志输出框
         log_group = QGroupBox("提取日志")
         log_group.setStyleSheet("""
@@ -266,9 +637,40 @@ class VideoFrame2PicPage(QWidget):
         )
         if file_path:
             self.selected_video = file_path
+            self.selected_videos = [file_path]
             self.lbl_video.setText(f"已选：{file_path}")
             self.append_log(f"✅ 选择视频文件：{file_path}")
 
+    def select_videos(self):
+        """批量选择多个视频文件"""
+        file_paths, _ = QFileDialog.getOpenFileNames(
+            self,
+            "选择视频文件（可多选）",
+            "",
+            "视频文件 (*.mp4 *.avi *.mov *.mkv)"
+        )
+        if file_paths:
+            self.set_videos(sorted(file_paths), f"{len(file_paths)} 个视频文件")
+
+    def select_video_folder(self):
+        """选择视频文件夹（提取其中所有视频）"""
+        folder_path = QFileDialog.getExistingDirectory(self, "选择视频文件夹")
+        if not folder_path:
+            return
+        from target_script import list_videos
+        file_paths = list_videos(folder_path)
+        if not file_paths:
+            QMessageBox.warning(self, "提示", "该文件夹中没有视频文件（MP4/AVI/MOV/MKV）！")
+            return
+        self.set_videos(file_paths, f"{folder_path}（{len(file_paths)} 个视频）")
+
+    def set_videos(self, file_paths, desc):
+        """记录选中的视频列表"""
+        self.selected_videos = file_paths
+        self.selected_video = file_paths[0]
+        self.lbl_video.setText(f"已选：{desc}")
+        self.append_log(f"✅ 选择{desc}")
+
     def select_output(self):
         """选择输出文件夹"""
         folder_path = QFileDialog.getExistingDirectory(self, "选择输出文件夹")
@@ -292,29 +694,146 @@ class VideoFrame2PicPage(QWidget):
         if not self.selected_output:
             QMessageBox.warning(self, "提示", "请先选择输出文件夹！")
             return
+        try:
+            options = self.collect_options()
+        except ValueError:
+            QMessageBox.warning(self, "提示", "提取设置请输入有效数字！")
+            return
+        if options["end_sec"] and options["end_sec"] <= options["start_sec"]:
+            QMessageBox.warning(self, "提示", "结束时间必须大于起始时间！")
+            return
+
+        try:
+            jobs = int(self.le_jobs.text().strip() or 0)
+        except ValueError:
+            QMessageBox.warning(self, "提示", "提取设置请输入有效数字！")
+            return
 
         # 禁用执行按钮，避免重复点击
         self.btn_run.setDisabled(True)
         self.btn_run.setText("提取中...")  # 按钮文字提示
+        self.btn_stop.setDisabled(False)
+        self.set_selection_enabled(False)  # 提取期间不允许更换视频
         QApplication.processEvents()  # 强制刷新UI
 
         #在主线程执行
         # self.run_target()
 
-        self.extract_thread = ExtractThread(self.selected_video, self.selected_output)
+        self.append_log(f"🔧 提取设置：{options}")
+        # 记录本次批量任务的视频列表快照，任务状态回调按此列表定位
+        self.batch_videos = list(self.selected_videos)
+        batch = len(self.batch_videos) > 1
+        self.job_table.setVisible(batch)
+        if batch:
+            self.job_table.setRowCount(len(self.batch_videos))
+            for row, path in enumerate(self.batch_videos):
+                self.job_table.setItem(row, 0, QTableWidgetItem(os.path.basename(path)))
+                self.job_table.setItem(row, 1, QTableWidgetItem(""))
+                self.job_table.setItem(row, 2, QTableWidgetItem(""))
+            self.append_log(f"📋 批量提取 {len(self.batch_videos)} 个视频，每个视频输出到以文件名命名的子文件夹")
+            self.extract_thread = BatchExtractThread(self.batch_videos, self.selected_output, options, jobs)
+            self.extract_thread.job_signal.connect(self.on_job_status)
+        else:
+            self.extract_thread = ExtractThread(self.selected_video, self.selected_output, options)
         #这两个方法用于接收线程中发射出来的信号信息
         ## 连接信号到槽函数
         self.extract_thread.log_signal.connect(self.append_log)
+        self.extract_thread.progress_signal.connect(self.on_extract_progress)
         self.extract_thread.finish_signal.connect(self.on_extract_finish)
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setValue(0)
+        self.lbl_progress.setText("")
         self.extract_thread.start()
 
+    def collect_options(self):
+        """收集页面上的提取设置（传给 target_script_fun 的关键字参数）"""
+        def text_of(line_edit):
+            return line_edit.text().strip()
+
+        roi = None
+        if text_of(self.le_roi):
+            roi = [int(v) for v in text_of(self.le_roi).replace("，", ",").split(",")]
+            if len(roi) != 4 or roi[2] <= 0 or roi[3] <= 0:
+                raise ValueError("裁剪区域格式为 x,y,宽,高")
+        resize = [int(text_of(self.le_resize_w) or 0), int(text_of(self.le_resize_h) or 0)]
+
+        return {
+            "workers": int(text_of(self.le_workers) or DEFAULT_WORKERS),
+            "processes": int(text_of(self.le_processes) or 1),
+            "step": int(text_of(self.le_step) or 1),
+            "target_fps": float(text_of(self.le_fps) or 0),
+            "start_sec": float(text_of(self.le_start) or 0),
+            "end_sec": float(text_of(self.le_end) or 0),
+            "keyframes_only": self.cb_keyframes.isChecked(),
+            "image_format": self.combo_format.currentData(),
+            "quality": int(text_of(self.le_quality)) if text_of(self.le_quality) else None,
+            "dedup_method": self.combo_dedup.currentData(),
+            "dedup_threshold": float(text_of(self.le_dedup_threshold) or 0),
+            "resume": self.cb_resume.isChecked(),
+            "resize": resize if any(resize) else None,
+            "interpolation": self.combo_interp.currentData(),
+            "grayscale": self.cb_grayscale.isChecked(),
+            "roi": roi,
+        }
+
+    def stop_extract(self):
+        """停止提取：通知提取线程尽快结束，已提取的进度保存为断点"""
+        if self.extract_thread and self.extract_thread.isRunning():
+            self.extract_thread.cancel()
+            self.btn_stop.setDisabled(True)
+            self.append_log("🛑 正在停止提取并保存断点...")
+
+    def on_extract_progress(self, stats):
+        """提取进度回调：刷新进度条与解码/写盘速度、剩余时间"""
+        total, done = stats["total"], stats["done"]
+        if total:
+            self.progress_bar.setRange(0, 100)
+            self.progress_bar.setValue(min(100, done * 100 // total))
+        else:
+            # 总帧数未知时显示忙碌状态
+            self.progress_bar.setRange(0, 0)
+        text = f"{done}/{total or '?'} 帧 | 解码 {stats['decode_fps']:.1f} 帧/秒 | 写盘 {stats['write_mbps']:.1f} MB/秒"
+        if stats["eta"] is not None:
+            text += f" | 剩余 {int(stats['eta'])} 秒"
+        if stats["queue_fill"] is not None:
+            text += f" | 写图队列 {stats['queue_fill']:.0%}"
+        if "jobs_total" in stats:
+            text = f"任务 {stats['jobs_finished']}/{stats['jobs_total']} | " + text
+        self.lbl_progress.setText(text)
+
+    def on_job_status(self, row, status, msg):
+        """批量任务状态回调：刷新任务列表对应行"""
+        colors = {"提取中": "#2980B9", "完成": "#27AE60", "失败": "#E74C3C", "已取消": "#7F8C8D"}
+        status_item = QTableWidgetItem(status)
+        status_item.setForeground(QColor(colors.get(status, "#333333")))
+        self.job_table.setItem(row, 1, status_item)
+        self.job_table.setItem(row, 2, QTableWidgetItem(msg))
+        if status == "提取中":
+            self.job_table.scrollToItem(status_item)
+        elif msg:
+            name = os.path.basename(self.batch_videos[row])
+            self.append_log(f"{'✅' if status == '完成' else '❌'} [{row + 1}/{len(self.batch_videos)}] {name} {status}：{msg}")
+
+    def set_selection_enabled(self, enabled):
+        """启用/禁用视频与输出文件夹的选择按钮"""
+        for btn in (self.btn_video, self.btn_videos, self.btn_video_folder, self.btn_output):
+            btn.setEnabled(enabled)
+
     def on_extract_finish(self, success, msg):
         """提取完成回调"""
+        if success:
+            self.progress_bar.setRange(0, 100)
+            self.progress_bar.setValue(100)
         self.btn_run.setDisabled(False)
         self.btn_run.setText("开始提取")  # 恢复按钮文字
+        self.btn_stop.setDisabled(True)
+        self.set_selection_enabled(True)
         if success:
             self.append_log(f"🎉 {msg}")
             QMessageBox.information(self, "成功", msg)
+        elif self.extract_thread and self.extract_thread.is_cancelled():
+            self.append_log(f"🛑 {msg}")
+            QMessageBox.information(self, "提示", msg)
         else:
             self.append_log(f"❌ {msg}")
             QMessageBox.critical(self, "失败", msg)
@@ -493,8 +1012,186 @@ class ImageDeduplicationPage(QWidget):
         self.cb_delete_dup.clicked.connect(self.on_checkbox_click)
         checkbox_row_layout.addWidget(self.cb_delete_dup)
 
+        # 批量比对：先计算全部哈希，再用向量化引擎一次性分组（阈值较大时更快）
+        self.cb_batch_mode = QCheckBox("批量比对（先计算全部哈希再一次性分组）")
+        self.cb_batch_mode.setFont(DESC_FONT)
+        self.cb_batch_mode.setStyleSheet("color: black;")
+        checkbox_row_layout.addWidget(self.cb_batch_mode)
+
+        # 哈希进程数：多进程并行解码图片、计算哈希，留空按CPU核数
+        lbl_hash_workers = QLabel("哈希进程数：")
+        lbl_hash_workers.setFont(DESC_FONT)
+        checkbox_row_layout.addWidget(lbl_hash_workers)
+
+        self.le_hash_workers = QLineEdit()
+        self.le_hash_workers.setFixedWidth(60)
+        self.le_hash_workers.setFont(DESC_FONT)
+        self.le_hash_workers.setPlaceholderText("自动")
+        self.le_hash_workers.setValidator(QIntValidator(1, 128))
+        checkbox_row_layout.addWidget(self.le_hash_workers)
+
         file_layout.addWidget(checkbox_row)
 
+        # 2.3 相似判定：哈希算法 / 哈希尺寸 / 阈值 / 级联初筛
+        hash_row = QWidget()
+        hash_row_layout = QHBoxLayout(hash_row)
+        hash_row_layout.setSpacing(10)
+        hash_row_layout.setAlignment(Qt.AlignCenter)
+        hash_row_layout.setContentsMargins(0, 0, 0, 0)
+
+        lbl_hash = QLabel("哈希算法：")
+        lbl_hash.setFont(DESC_FONT)
+        hash_row_layout.addWidget(lbl_hash)
+        self.combo_hash = QComboBox()
+        self.combo_hash.setFixedWidth(190)
+        self.combo_hash.setFont(DESC_FONT)
+        for text, name in DEDUP_HASH_ALGORITHMS:
+            self.combo_hash.addItem(text, name)
+        hash_row_layout.addWidget(self.combo_hash)
+
+        lbl_hash_size = QLabel("尺寸：")
+        lbl_hash_size.setFont(DESC_FONT)
+        hash_row_layout.addWidget(lbl_hash_size)
+        self.combo_hash_size = QComboBox()
+        self.combo_hash_size.setFixedWidth(70)
+        self.combo_hash_size.setFont(DESC_FONT)
+        for size in (8, 16):
+            self.combo_hash_size.addItem(str(size), size)
+        hash_row_layout.addWidget(self.combo_hash_size)
+
+        lbl_hash_threshold = QLabel("阈值：")
+        lbl_hash_threshold.setFont(DESC_FONT)
+        hash_row_layout.addWidget(lbl_hash_threshold)
+        self.le_hash_threshold = QLineEdit()
+        self.le_hash_threshold.setFixedWidth(60)
+        self.le_hash_threshold.setFont(DESC_FONT)
+        self.le_hash_threshold.setPlaceholderText("自动")
+        # 阈值上限为哈希位数-1（默认 pHash 8×8 共 64 位），切换算法/尺寸时更新
+        self.le_hash_threshold.setValidator(QIntValidator(0, 63))
+        hash_row_layout.addWidget(self.le_hash_threshold)
+        self.combo_hash.currentIndexChanged.connect(self.update_threshold_range)
+        self.combo_hash_size.currentIndexChanged.connect(self.update_threshold_range)
+
+        self.cb_cascade = QCheckBox("级联（dHash初筛）")
+        self.cb_cascade.setFont(DESC_FONT)
+        self.cb_cascade.setStyleSheet("color: black;")
+        hash_row_layout.addWidget(self.cb_cascade)
+
+        tip_hash = QLabel("阈值为汉明距离，越大越宽松；尺寸16更精细；colorhash的尺寸为每个颜色区间的位数")
+        tip_hash.setFont(QFont("微软雅黑", 9))
+        tip_hash.setStyleSheet("color: #666666;")
+        hash_row_layout.addWidget(tip_hash)
+
+        file_layout.addWidget(hash_row)
+
+        # 2.4 每组保留规则 / 报告格式
+        keeper_row = QWidget()
+        keeper_row_layout = QHBoxLayout(keeper_row)
+        keeper_row_layout.setSpacing(10)
+        keeper_row_layout.setAlignment(Qt.AlignCenter)
+        keeper_row_layout.setContentsMargins(0, 0, 0, 0)
+
+        lbl_keeper = QLabel("每组保留：")
+        lbl_keeper.setFont(DESC_FONT)
+        keeper_row_layout.addWidget(lbl_keeper)
+        self.combo_keeper = QComboBox()
+        self.combo_keeper.setFixedWidth(130)
+        self.combo_keeper.setFont(DESC_FONT)
+        for text, name in DEDUP_KEEPER_RULES:
+            self.combo_keeper.addItem(text, name)
+        keeper_row_layout.addWidget(self.combo_keeper)
+
+        lbl_report = QLabel("报告格式：")
+        lbl_report.setFont(DESC_FONT)
+        keeper_row_layout.addWidget(lbl_report)
+        self.combo_report = QComboBox()
+        self.combo_report.setFixedWidth(90)
+        self.combo_report.setFont(DESC_FONT)
+        self.combo_report.addItem("CSV", "csv")
+        self.combo_report.addItem("JSON", "json")
+        keeper_row_layout.addWidget(self.combo_report)
+
+        # 监视文件夹：首轮建立索引后定时扫描，只比对新增或修改过的图片
+        self.cb_watch = QCheckBox("监视文件夹")
+        self.cb_watch.setFont(DESC_FONT)
+        self.cb_watch.setStyleSheet("color: black;")
+        keeper_row_layout.addWidget(self.cb_watch)
+
+        lbl_watch_interval = QLabel("间隔(秒)：")
+        lbl_watch_interval.setFont(DESC_FONT)
+        keeper_row_layout.addWidget(lbl_watch_interval)
+        self.le_watch_interval = QLineEdit()
+        self.le_watch_interval.setFixedWidth(60)
+        self.le_watch_interval.setFont(DESC_FONT)
+        self.le_watch_interval.setPlaceholderText("10")
+        self.le_watch_interval.setValidator(QIntValidator(1, 86400))
+        keeper_row_layout.addWidget(self.le_watch_interval)
+
+        tip_keeper = QLabel("相似关系可传递的图片合为一组；报告保存在所选文件夹，分析完成后才统一删除；"
+                            "监视时先出现者保留，新增的重复图片被标记")
+        tip_keeper.setFont(QFont("微软雅黑", 9))
+        tip_keeper.setStyleSheet("color: #666666;")
+        keeper_row_layout.addWidget(tip_keeper)
+
+        file_layout.addWidget(keeper_row)
+
+        # 2.5 扫描过滤：扩展名 / 文件名通配符 / 文件大小
+        filter_row = QWidget()
+        filter_row_layout = QHBoxLayout(filter_row)
+        filter_row_layout.setSpacing(10)
+        filter_row_layout.setAlignment(Qt.AlignCenter)
+        filter_row_layout.setContentsMargins(0, 0, 0, 0)
+
+        lbl_extensions = QLabel("扩展名：")
+        lbl_extensions.setFont(DESC_FONT)
+        filter_row_layout.addWidget(lbl_extensions)
+        self.le_extensions = QLineEdit()
+        self.le_extensions.setFixedWidth(150)
+        self.le_extensions.setFont(DESC_FONT)
+        self.le_extensions.setPlaceholderText("全部常见格式")
+        filter_row_layout.addWidget(self.le_extensions)
+
+        lbl_include = QLabel("包含：")
+        lbl_include.setFont(DESC_FONT)
+        filter_row_layout.addWidget(lbl_include)
+        self.le_include = QLineEdit()
+        self.le_include.setFixedWidth(110)
+        self.le_include.setFont(DESC_FONT)
+        self.le_include.setPlaceholderText("如 IMG_*")
+        filter_row_layout.addWidget(self.le_include)
+
+        lbl_exclude = QLabel("排除：")
+        lbl_exclude.setFont(DESC_FONT)
+        filter_row_layout.addWidget(lbl_exclude)
+        self.le_exclude = QLineEdit()
+        self.le_exclude.setFixedWidth(110)
+        self.le_exclude.setFont(DESC_FONT)
+        self.le_exclude.setPlaceholderText("如 *_thumb*")
+        filter_row_layout.addWidget(self.le_exclude)
+
+        lbl_file_size = QLabel("大小(KB)：")
+        lbl_file_size.setFont(DESC_FONT)
+        filter_row_layout.addWidget(lbl_file_size)
+        self.le_min_size = QLineEdit()
+        self.le_min_size.setFixedWidth(60)
+        self.le_min_size.setFont(DESC_FONT)
+        self.le_min_size.setPlaceholderText("最小")
+        self.le_min_size.setValidator(QIntValidator(0, 2147483647))
+        filter_row_layout.addWidget(self.le_min_size)
+        self.le_max_size = QLineEdit()
+        self.le_max_size.setFixedWidth(60)
+        self.le_max_size.setFont(DESC_FONT)
+        self.le_max_size.setPlaceholderText("最大")
+        self.le_max_size.setValidator(QIntValidator(0, 2147483647))
+        filter_row_layout.addWidget(self.le_max_size)
+
+        tip_filter = QLabel("多项用逗号分隔；排除可匹配文件名或相对路径（匹配的文件夹整个跳过）")
+        tip_filter.setFont(QFont("微软雅黑", 9))
+        tip_filter.setStyleSheet("color: #666666;")
+        filter_row_layout.addWidget(tip_filter)
+
+        file_layout.addWidget(filter_row)
+
         main_layout.addWidget(file_group)
 
         # 3. 开始去重按钮（与视频页面按钮样式一致）
@@ -526,6 +1223,31 @@ class ImageDeduplicationPage(QWidget):
         self.btn_run.clicked.connect(self.run_dedup)
         btn_row_layout.addWidget(self.btn_run)
 
+        # 停止监视按钮：只在监视文件夹模式下可用
+        self.btn_stop_watch = QPushButton("停止监视")
+        self.btn_stop_watch.setFixedSize(120, 40)
+        self.btn_stop_watch.setFont(QFont("微软雅黑", 12, QFont.Bold))
+        self.btn_stop_watch.setStyleSheet("""
+            QPushButton {
+                background-color: #F44336;
+                color: white;
+                border: none;
+                border-radius: 5px;
+            }
+            QPushButton:hover {
+                background-color: #D32F2F;
+            }
+            QPushButton:disabled {
+                background-color: #95A5A6;
+                color: #EEEEEE;
+                border: 1px solid #7F8C8D;
+                cursor: not-allowed;
+            }
+        """)
+        self.btn_stop_watch.clicked.connect(self.stop_watch)
+        self.btn_stop_watch.setDisabled(True)  # 默认禁用
+        btn_row_layout.addWidget(self.btn_stop_watch)
+
         main_layout.addWidget(btn_row)
 
         # 4. 日志输出框（与视频页面一致）
@@ -617,6 +1339,24 @@ class ImageDeduplicationPage(QWidget):
             Q_ARG(int, self.log_text.verticalScrollBar().maximum())
         )
 
+    def max_threshold(self):
+        """当前算法与尺寸下的最大阈值（哈希位数-1）"""
+        from duplicates_photo import hash_bits
+        return hash_bits(self.combo_hash.currentData(), self.combo_hash_size.currentData()) - 1
+
+    def update_threshold_range(self):
+        """切换算法/尺寸后更新阈值输入范围，已填写的值超出时改为上限"""
+        top = self.max_threshold()
+        self.le_hash_threshold.setValidator(QIntValidator(0, top))
+        self.le_hash_threshold.setToolTip(f"0 ~ {top}")
+        threshold = self.le_hash_threshold.text().strip()
+        if threshold and int(threshold) > top:
+            self.le_hash_threshold.setText(str(top))
+
+    def split_patterns(self, text):
+        """把逗号、分号或空格分隔的输入拆成列表"""
+        return [item for item in re.split(r"[,;，；\s]+", text.strip()) if item]
+
     def run_dedup(self):
         """开始图片去重"""
         # 前置校验
@@ -634,7 +1374,33 @@ class ImageDeduplicationPage(QWidget):
 
         # 启动去重线程
         try:
-            self.dedup_thread = ImageDedupThread(self.selected_folder, self.is_delete_dup)
+            threshold = self.le_hash_threshold.text().strip()
+            min_size = self.le_min_size.text().strip()
+            max_size = self.le_max_size.text().strip()
+            extensions = ["." + ext.lstrip(".").lower() for ext in self.split_patterns(self.le_extensions.text())]
+            options = {
+                "batch_mode": self.cb_batch_mode.isChecked(),
+                "workers": int(self.le_hash_workers.text().strip() or 0),
+                "algorithm": self.combo_hash.currentData(),
+                "hash_size": self.combo_hash_size.currentData(),
+                "threshold": min(int(threshold), self.max_threshold()) if threshold else None,
+                "cascade": self.cb_cascade.isChecked(),
+                "keeper_rule": self.combo_keeper.currentData(),
+                "report_format": self.combo_report.currentData(),
+                "extensions": extensions or None,
+                "include": self.split_patterns(self.le_include.text()) or None,
+                "exclude": self.split_patterns(self.le_exclude.text()) or None,
+                "min_size": int(min_size) * 1024 if min_size else 0,
+                "max_size": int(max_size) * 1024 if max_size else None,
+            }
+            if self.cb_watch.isChecked():
+                interval = self.le_watch_interval.text().strip()
+                self.dedup_thread = ImageWatchThread(self.selected_folder, self.is_delete_dup,
+                                                     int(interval) if interval else None, **options)
+                self.btn_run.setText("监视中...")
+                self.btn_stop_watch.setDisabled(False)
+            else:
+                self.dedup_thread = ImageDedupThread(self.selected_folder, self.is_delete_dup, **options)
             self.dedup_thread.log_signal.connect(self.append_log)
             self.dedup_thread.finish_signal.connect(self.on_dedup_finish)
             self.dedup_thread.start()
@@ -642,10 +1408,18 @@ class ImageDeduplicationPage(QWidget):
             self.append_log(f"❌ 线程启动失败：{str(e)}")
             self.ensure_btn_enabled()
 
+    def stop_watch(self):
+        """停止监视文件夹：当前一轮处理完后结束"""
+        if self.dedup_thread and self.dedup_thread.isRunning():
+            self.dedup_thread.cancel()
+            self.btn_stop_watch.setDisabled(True)
+            self.append_log("🛑 正在停止监视...")
+
     def on_dedup_finish(self, success, msg):
         """去重完成回调"""
         self.btn_run.setDisabled(False)
         self.btn_run.setText("开始去重")
+        self.btn_stop_watch.setDisabled(True)
         QApplication.processEvents()
 
         if success:
@@ -723,8 +1497,8 @@ class FileSizeToolPage(QWidget):
         title_layout.addWidget(page_title)
 
         page_desc = QLabel("""
-        功能说明：统计指定文件或文件夹的大小，支持递归统计文件夹内所有文件总大小。
-        使用步骤：1.选择文件/文件夹 → 2.点击判断大小 → 3.查看大小统计日志
+        功能说明：统计指定文件或文件夹的大小，按文件夹逐级汇总大小和文件数，并列出最大的文件与文件夹。
+        使用步骤：1.选择文件/文件夹 → 2.点击判断大小 → 3.在结果表中展开/排序查看占用
         """)
         page_desc.setFont(DESC_FONT)
         page_desc.setWordWrap(True)
@@ -839,6 +1613,43 @@ class FileSizeToolPage(QWidget):
 
         file_layout.addWidget(size_input_row)
 
+        # 统计选项行
+        option_row = QWidget()
+        option_row_layout = QHBoxLayout(option_row)
+        option_row_layout.setSpacing(10)
+        option_row_layout.setAlignment(Qt.AlignCenter)
+        option_row_layout.setContentsMargins(0, 0, 0, 0)
+
+        self.cb_allocated = QCheckBox("按占用空间")
+        self.cb_allocated.setFont(DESC_FONT)
+        self.cb_allocated.setStyleSheet("color: black;")
+        self.cb_allocated.setToolTip("按实际占用的磁盘块统计（稀疏文件更小、小文件按块取整），Windows 上仍为文件大小")
+        option_row_layout.addWidget(self.cb_allocated)
+
+        self.cb_hardlinks = QCheckBox("硬链接去重")
+        self.cb_hardlinks.setFont(DESC_FONT)
+        self.cb_hardlinks.setStyleSheet("color: black;")
+        self.cb_hardlinks.setToolTip("同一文件的多个硬链接只统计一次（不能与增量索引同时使用）")
+        option_row_layout.addWidget(self.cb_hardlinks)
+
+        self.cb_one_fs = QCheckBox("不跨文件系统")
+        self.cb_one_fs.setFont(DESC_FONT)
+        self.cb_one_fs.setStyleSheet("color: black;")
+        self.cb_one_fs.setToolTip("不进入挂载在所选文件夹下的其它磁盘/网络盘")
+        option_row_layout.addWidget(self.cb_one_fs)
+
+        self.cb_index = QCheckBox("增量索引")
+        self.cb_index.setFont(DESC_FONT)
+        self.cb_index.setStyleSheet("color: black;")
+        option_row_layout.addWidget(self.cb_index)
+
+        tip_index = QLabel("增量索引：再次统计时只重新扫描修改时间变化的文件夹（文件原地改写不会被发现）")
+        tip_index.setFont(QFont("微软雅黑", 9))
+        tip_index.setStyleSheet("color: #666666;")
+        option_row_layout.addWidget(tip_index)
+
+        file_layout.addWidget(option_row)
+
         main_layout.addWidget(file_group)
 
         # 3. 操作按钮区域
@@ -872,6 +1683,37 @@ class FileSizeToolPage(QWidget):
 
         main_layout.addWidget(btn_row)
 
+        # 统计结果：文件夹大小树 + 最大文件 / 最大文件夹列表，点击表头可排序
+        self.result_tabs = QTabWidget()
+        self.result_tabs.setFont(DESC_FONT)
+
+        self.size_tree = QTreeWidget()
+        self.size_tree.setColumnCount(4)
+        self.size_tree.setHeaderLabels(["名称", "大小", "文件数", "占比"])
+        self.size_tree.setFont(DESC_FONT)
+        self.size_tree.setStyleSheet("""
+            QTreeWidget {
+                background-color: white;
+                color: black;
+                border: 1px solid #DDDDDD;
+                border-radius: 5px;
+            }
+        """)
+        self.size_tree.setSortingEnabled(True)
+        self.size_tree.header().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.size_tree.header().setStretchLastSection(False)
+        # 子文件夹在展开时才创建，百万级文件夹的结果也不会一次性塞进界面
+        self.size_tree.itemExpanded.connect(self.expand_size_node)
+        self.result_tabs.addTab(self.size_tree, "文件夹大小树")
+
+        self.file_table = self.create_size_table()
+        self.result_tabs.addTab(self.file_table, "最大文件")
+        self.dir_table = self.create_size_table()
+        self.result_tabs.addTab(self.dir_table, "最大文件夹")
+
+        self.result_tabs.setMinimumHeight(260)
+        main_layout.addWidget(self.result_tabs, stretch=2)
+
         # 4. 日志输出框
         log_group = QGroupBox("大小统计日志")
         log_group.setStyleSheet("""
@@ -904,11 +1746,94 @@ class FileSizeToolPage(QWidget):
                 padding: 8px;
             }
         """)
-        self.log_text.setMinimumHeight(200)
+        self.log_text.setMinimumHeight(120)
         log_layout.addWidget(self.log_text)
 
         main_layout.addWidget(log_group, stretch=1)
 
+    def create_size_table(self):
+        """创建 大小 | 路径 两列的可排序结果表"""
+        table = QTableWidget(0, 2)
+        table.setHorizontalHeaderLabels(["大小", "路径"])
+        table.setFont(DESC_FONT)
+        table.setStyleSheet("""
+            QTableWidget {
+                background-color: white;
+                color: black;
+                border: 1px solid #DDDDDD;
+                border-radius: 5px;
+            }
+        """)
+        table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        table.verticalHeader().setVisible(False)
+        table.setSortingEnabled(True)
+        header = table.horizontalHeader()
+        header.setSectionResizeMode(0, QHeaderView.ResizeToContents)
+        header.setSectionResizeMode(1, QHeaderView.Stretch)
+        return table
+
+    def fill_size_table(self, table, rows):
+        """
+        填充结果表
+        :param table: 结果表
+        :param rows: [(字节数, 路径)]
+        """
+        from file_size import convert_size
+
+        table.setSortingEnabled(False)
+        table.setRowCount(len(rows))
+        for row, (size, path) in enumerate(rows):
+            table.setItem(row, 0, SizeTableItem(convert_size(size), size))
+            table.setItem(row, 1, QTableWidgetItem(path))
+        table.setSortingEnabled(True)
+        table.sortItems(0, Qt.DescendingOrder)
+
+    def add_size_node(self, parent, node, total_size):
+        """
+        在大小树中添加一个文件夹节点，有子文件夹时先挂一个占位子项，展开时再创建
+        :param parent: 父级条目或树控件
+        :param node: file_size.DirNode
+        :param total_size: 根节点字节数，用于计算占比
+        """
+        from file_size import convert_size
+
+        name = os.path.basename(node.path.rstrip("\\/")) or node.path
+        if parent is self.size_tree:
+            name = node.path
+        ratio = node.size / total_size if total_size else 0
+        item = SizeTreeItem(parent, [name, convert_size(node.size), str(node.file_count), f"{ratio:.1%}"])
+        item.setData(1, Qt.UserRole, node.size)
+        item.setData(2, Qt.UserRole, node.file_count)
+        item.setData(3, Qt.UserRole, ratio)
+        item.setToolTip(0, node.path)
+        item.node = node
+        item.total_size = total_size
+        if node.children:
+            QTreeWidgetItem(item)
+        return item
+
+    def expand_size_node(self, item):
+        """展开时把占位子项替换为真实的子文件夹"""
+        node = getattr(item, "node", None)
+        if node is None or getattr(item, "loaded", False):
+            return
+        item.loaded = True
+        item.takeChildren()
+        for child in node.children:
+            self.add_size_node(item, child, item.total_size)
+
+    def show_size_result(self, result):
+        """
+        展示统计结果
+        :param result: file_size.SizeResult
+        """
+        self.size_tree.clear()
+        root_item = self.add_size_node(self.size_tree, result.root, result.total_size)
+        self.size_tree.sortItems(1, Qt.DescendingOrder)
+        root_item.setExpanded(True)
+        self.fill_size_table(self.file_table, result.largest_files)
+        self.fill_size_table(self.dir_table, result.largest_dirs)
+
     def select_file(self):
         """选择单个文件"""
         file_path, _ = QFileDialog.getOpenFileName(
@@ -949,6 +1874,25 @@ class FileSizeToolPage(QWidget):
             Q_ARG(int, self.log_text.verticalScrollBar().maximum())
         )
 
+    def append_log_batch(self, lines):
+        """一次追加一批日志（统计线程攒批发来），整批只刷新、滚动一次"""
+        from datetime import datetime
+        timestamp = datetime.now().strftime("[%Y-%m-%d %H:%M:%S]")
+        block = "\n".join(f"{timestamp} {line.strip()}" for line in lines)
+        # 与 append_log 走同一个排队调用，保证和单条日志的先后顺序一致
+        QMetaObject.invokeMethod(
+            self.log_text,
+            "append",
+            Qt.QueuedConnection,
+            Q_ARG(str, block)
+        )
+        QMetaObject.invokeMethod(
+            self.log_text.verticalScrollBar(),
+            "setValue",
+            Qt.QueuedConnection,
+            Q_ARG(int, self.log_text.verticalScrollBar().maximum())
+        )
+
     def calc_size(self):
         """计算文件/文件夹大小"""
         if not self.selected_path:
@@ -973,8 +1917,13 @@ class FileSizeToolPage(QWidget):
         self.append_log("📌 开始统计文件/文件夹大小...")
 
         try:
-            self.size_thread = FileSizeThread(self.selected_path,user_size)
+            self.size_thread = FileSizeThread(self.selected_path, user_size, self.cb_index.isChecked(),
+                                              allocated=self.cb_allocated.isChecked(),
+                                              dedup_hardlinks=self.cb_hardlinks.isChecked(),
+                                              one_filesystem=self.cb_one_fs.isChecked())
             self.size_thread.log_signal.connect(self.append_log)
+            self.size_thread.log_batch_signal.connect(self.append_log_batch)
+            self.size_thread.result_signal.connect(self.show_size_result)
             self.size_thread.finish_signal.connect(self.on_calc_finish)
             self.size_thread.start()
         except Exception as e:
@@ -1354,12 +2303,26 @@ class SmartAlarmPage(QWidget):
 #视频提取线程
 class ExtractThread(QThread):
     log_signal = pyqtSignal(str)
+    progress_signal = pyqtSignal(dict)  # 提取进度统计，字段见 target_script.ExtractProgress
     finish_signal = pyqtSignal(bool, str)
 
-    def __init__(self, video_path, output_dir):
+    def __init__(self, video_path, output_dir, options=None):
         super().__init__()
         self.video_path = video_path
         self.output_dir = output_dir
+        self.options = options or {}  # target_script_fun 的提取设置
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        """请求停止提取（提取函数会保存断点后返回）"""
+        self.cancel_event.set()
+
+    def is_cancelled(self):
+        return self.cancel_event.is_set()
+
+    def on_progress(self, stats):
+        """进度回调（target_script 已节流，分段并行时为各子进程之和）"""
+        self.progress_signal.emit(stats)
 
     def run(self):
         """提取逻辑"""
@@ -1371,10 +2334,14 @@ class ExtractThread(QThread):
                 # 发射信号
                 self.log_signal.emit("⏳ 正在提取帧（请稍候）...")
                 # result, msg = True,"success"
-                result,msg=target_script_fun(self.video_path, self.output_dir)
+                result,msg=target_script_fun(self.video_path, self.output_dir,
+                                             progress_callback=self.on_progress,
+                                             cancel_event=self.cancel_event, **self.options)
                 if result:
                     self.log_signal.emit(msg)
                     self.finish_signal.emit(True, f"提取完成，输出路径：{self.output_dir}")
+                elif self.is_cancelled():
+                    self.finish_signal.emit(False, msg)
                 else:
                     self.log_signal.emit(msg)
                     self.finish_signal.emit(False, f"提取失败，请检查输入文件和输出路径是否正确！")
@@ -1382,94 +2349,420 @@ class ExtractThread(QThread):
         except Exception as e:
             self.finish_signal.emit(False, str(e))
 
+#批量视频提取线程
+class BatchExtractThread(ExtractThread):
+    job_signal = pyqtSignal(int, str, str)  # 任务序号, 状态, 结果信息
+
+    def __init__(self, video_paths, output_dir, options=None, jobs=0):
+        super().__init__("", output_dir, options)
+        self.video_paths = video_paths
+        self.jobs = jobs  # 同时运行的任务数，0 为自动
+
+    def on_job(self, index, status, msg):
+        self.job_signal.emit(index, status, msg)
+
+    def run(self):
+        """批量提取逻辑"""
+        try:
+            from target_script import extract_batch
+
+            self.log_signal.emit(f"⏳ 正在批量提取 {len(self.video_paths)} 个视频（请稍候）...")
+            result, msg = extract_batch(self.video_paths, self.output_dir, self.jobs,
+                                        job_callback=self.on_job, progress_callback=self.on_progress,
+                                        cancel_event=self.cancel_event, **self.options)
+            self.finish_signal.emit(result, f"{msg}\n输出路径：{self.output_dir}")
+        except Exception as e:
+            self.finish_signal.emit(False, str(e))
+
 #图片去重线程
 class ImageDedupThread(QThread):
     """图片去重线程"""
     log_signal = pyqtSignal(str)
     finish_signal = pyqtSignal(bool, str)
 
-    def __init__(self, folder_path, is_delete_dup):
+    def __init__(self, folder_path, is_delete_dup, batch_mode=False, workers=0,
+                 algorithm="phash", hash_size=8, threshold=None, cascade=False,
+                 keeper_rule="resolution", report_format="csv",
+                 extensions=None, include=None, exclude=None, min_size=0, max_size=None):
         super().__init__()
+        from duplicates_photo import default_distance, cascade_distance, CASCADE_PREFILTER, IMAGE_EXTENSIONS
         self.folder_path = folder_path
         self.is_delete_dup = is_delete_dup
+        self.batch_mode = batch_mode  # 批量比对：先计算全部哈希，再向量化一次性分组
+        self.workers = workers  # 哈希进程数，0 表示按CPU核数
+        self.algorithm = algorithm  # 相似判定使用的哈希算法
+        self.hash_size = hash_size
+        # 汉明距离阈值，未指定时按哈希位数取默认值
+        self.threshold = default_distance(algorithm, hash_size) if threshold is None else threshold
+        # 级联：dHash 初筛后只对候选图片计算所选哈希（所选即 dHash 时无需级联）
+        self.cascade = cascade and algorithm != CASCADE_PREFILTER
+        # 初筛阈值随用户阈值放宽；阈值过大时初筛会漏掉复核能通过的图片对，改为直接比对
+        self.cascade_distance = cascade_distance(algorithm, hash_size, self.threshold)
+        self.cascade_skipped = self.cascade and self.cascade_distance is None
+        if self.cascade_skipped:
+            self.cascade = False
+        self.keeper_rule = keeper_rule  # 每组保留哪一张：resolution / size / oldest
+        self.report_format = report_format  # 去重报告格式：csv / json
+        # 扫描过滤：扩展名（默认全部常见格式）、文件名通配符、大小范围（字节）
+        self.extensions = tuple(extensions or IMAGE_EXTENSIONS)
+        self.include = include
+        self.exclude = exclude
+        self.min_size = min_size
+        self.max_size = max_size
+        self.paths = []  # 扫描到的图片（遍历顺序）
+        self.sizes = {}  # 扫描时取得的文件大小
+        self.error_count = 0  # 处理失败（无法解码等）的图片数
+
+    def scan_images(self, cache=None):
+        """
+        用 os.scandir 流式扫描图片，边遍历边产出路径，进程池在遍历结束前就开始计算哈希
+        扫描到的路径、大小和修改时间记入 self.paths / self.sizes / self.mtimes，stat 结果交给哈希缓存核对，后续不再重复 stat
+        """
+        from duplicates_photo import scan_files
+        for entry in scan_files(self.folder_path, self.extensions, self.include, self.exclude,
+                                self.min_size, self.max_size):
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue  # 遍历期间文件被删除
+            self.paths.append(entry.path)
+            self.sizes[entry.path] = stat.st_size
+            self.mtimes[entry.path] = stat.st_mtime_ns
+            if cache is not None:
+                cache.check_stat(entry.path, stat)
+            yield entry.path
+
+    def open_cache(self):
+        """打开文件夹的哈希缓存（路径+大小+修改时间未变的图片不再重新计算）"""
+        from duplicates_photo import open_hash_cache
+        return open_hash_cache(self.folder_path)
+
+    def prune_cache(self, cache):
+        """扫描结束后清理已不存在的文件记录"""
+        removed = cache.prune(self.paths)
+        if removed:
+            self.log_signal.emit(f"♻️ 哈希缓存：清理 {removed} 条已不存在文件的记录")
+
+    def close_cache(self, cache):
+        """保存哈希缓存并输出命中情况"""
+        cache.close()
+        self.log_signal.emit(f"♻️ 哈希缓存：命中 {cache.hits} 次，新计算 {cache.misses} 次")
+
+    def open_pool(self):
+        """创建哈希进程池：图片在子进程中解码并计算哈希，只把哈希值传回本线程比对"""
+        from duplicates_photo import create_hash_pool, HASH_WORKERS
+        workers = self.workers or HASH_WORKERS
+        self.log_signal.emit(f"⚙️ 哈希进程数：{workers}")
+        return create_hash_pool(workers)
+
+    def close_pool(self, executor):
+        """关闭哈希进程池，出错提前结束时取消尚未开始的任务"""
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    def find_exact(self, paths, cache=None, executor=None):
+        """第一层：完全重复文件（先按大小分组，再比较头尾部分哈希，最后才读完整内容）"""
+        from duplicates_photo import find_exact_duplicates
+        exact = find_exact_duplicates(paths, cache=cache, executor=executor, sizes=self.sizes)
+        self.log_signal.emit(f"⏳ 完全重复检测完成：{len(paths)} 张图片中 {len(exact)} 张与其它文件内容相同")
+        return exact
+
+    def report_error(self, path, error):
+        """单张图片处理失败：只记录日志并计数，继续处理其它图片（失败个数在结果汇总中给出）"""
+        print(f'处理失败 {path}: {error}')
+        self.error_count = self.error_count + 1
+        self.log_signal.emit(f"❌ 处理失败 {path}: {error}")
+
+    #逐张比对：每张图片与索引中已有的所有图片比较
+    def find_similar(self, results):
+        """
+        :param results: compute_hashes 的结果 [(路径, 整数哈希, 错误信息)]
+        :return: 所有汉明距离不超过阈值的 (路径, 路径) 对
+        """
+        from duplicates_photo import hash_bits, HammingIndex
+        # 哈希索引：按汉明距离查找相似图片，避免与所有已有图片逐个比较
+        hash_index = HammingIndex(self.threshold, hash_bits(self.algorithm, self.hash_size))
+        pairs = []
+        for path, img_hash, error in results:
+            if error is not None:
+                self.report_error(path, error)
+                continue
+            pairs.extend((similar_path, path) for _, similar_path in hash_index.query(img_hash))
+            hash_index.add(img_hash, path)
+        return pairs
+
+    #批量比对：先计算全部哈希，再向量化计算所有图片对的汉明距离，结果与逐张比对一致
+    def find_similar_batch(self, results):
+        """
+        :param results: compute_hashes 的结果 [(路径, 整数哈希, 错误信息)]
+        :return: 所有汉明距离不超过阈值的 (路径, 路径) 对
+        """
+        from duplicates_photo import hash_bits, iter_similar_pairs
+        # 计算成功的图片及其哈希，按扫描顺序
+        unique_paths = []
+        hashes = []
+        for path, img_hash, error in results:
+            if error is not None:
+                self.report_error(path, error)
+                continue
+            unique_paths.append(path)
+            hashes.append(img_hash)
+
+        self.log_signal.emit(f"⏳ 哈希计算完成，正在批量比对 {len(unique_paths)} 张图片...")
+        pairs = []
+        for rows, cols, _ in iter_similar_pairs(hashes, self.threshold,
+                                                bits=hash_bits(self.algorithm, self.hash_size)):
+            pairs.extend((unique_paths[i], unique_paths[j]) for i, j in zip(rows.tolist(), cols.tolist()))
+        return pairs
+
+    #级联比对：dHash 初筛出候选，只对候选图片计算所选哈希复核
+    def find_similar_cascade(self, results, cache=None, executor=None):
+        """
+        :param results: 初筛哈希（dHash）的 compute_hashes 结果 [(路径, 整数哈希, 错误信息)]
+        :return: 通过复核的 (路径, 路径) 对
+        """
+        from duplicates_photo import compute_hashes, find_candidate_pairs, confirm_candidate_pairs
+        unique_paths = []
+        prefilter_hashes = []
+        for path, img_hash, error in results:
+            if error is not None:
+                self.report_error(path, error)
+                continue
+            unique_paths.append(path)
+            prefilter_hashes.append(img_hash)
+
+        rows, cols = find_candidate_pairs(prefilter_hashes, self.cascade_distance)
+        candidates = sorted(set(rows.tolist()) | set(cols.tolist()))
+        self.log_signal.emit(f"⏳ 初筛完成：{len(unique_paths)} 张图片中 {len(candidates)} 张有相似候选，正在复核...")
+        hashes = {}
+        candidate_hashes = compute_hashes([unique_paths[i] for i in candidates],
+                                          self.algorithm, self.hash_size, cache, executor)
+        for i, (path, img_hash, error) in zip(candidates, candidate_hashes):
+            if error is not None:
+                self.report_error(path, error)
+                continue
+            hashes[i] = img_hash
+        return [(unique_paths[i], unique_paths[j])
+                for i, j in confirm_candidate_pairs(rows, cols, hashes, self.threshold)]
+
+    def log_groups(self, groups):
+        """按组输出重复图片及每组保留的图片"""
+        for group in groups:
+            keeper = next(m for m in group["members"] if m["role"] == "keep")
+            self.log_signal.emit(f"📦 重复组 {group['group']}：保留 {keeper['path']}"
+                                 f"（{keeper['width']}x{keeper['height']}，{keeper['size']} 字节）")
+            for member in group["members"]:
+                if member["role"] != "duplicate":
+                    continue
+                if member["match"] == "exact":
+                    self.log_signal.emit(f'完全重复文件: {member["path"]} <=> {keeper["path"]}')
+                else:
+                    self.log_signal.emit(f'相似图片: {member["path"]} ≈ {keeper["path"]}')
 
-    #核心去重逻辑
-    def find_duplicates(self):
-        from duplicates_photo import del_file, get_image_phash, get_file_md5
-        md5_dict = {}
-        phash_dict = {}
+    def save_report(self, groups):
+        """把重复组写入文件夹下的去重报告"""
+        from duplicates_photo import write_report
+        report_path = os.path.join(self.folder_path,
+                                   f"dedup_report_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.{self.report_format}")
+        try:
+            write_report(groups, report_path)
+            self.log_signal.emit(f"📄 去重报告：{report_path}")
+        except OSError as e:
+            self.log_signal.emit(f"❌ 去重报告写入失败：{str(e)}")
+
+    #核心去重逻辑：先找出全部匹配关系并合并为重复组，分析完成后再统一删除
+    def dedup_folder(self, cache, executor):
+        """
+        整体去重一遍：扫描并计算哈希 → 完全重复 → 相似比对 → 合并重复组 → 写报告 → 批量删除
+        :return: (重复组, 删除个数)
+        """
+        from duplicates_photo import (compute_hashes, build_duplicate_groups, delete_duplicates,
+                                      CASCADE_PREFILTER, DEFAULT_HASH_SIZE)
+
+        self.paths = []
+        self.sizes = {}
+        self.mtimes = {}
+        if self.cascade_skipped:
+            self.log_signal.emit(f"⚠️ 阈值 {self.threshold} 超出 dHash 初筛可覆盖的范围，本次不使用级联")
+        # 边扫描边计算哈希（级联模式先算初筛用的 dHash），遍历与解码同时进行
+        if self.cascade:
+            algorithm, hash_size = CASCADE_PREFILTER, DEFAULT_HASH_SIZE
+        else:
+            algorithm, hash_size = self.algorithm, self.hash_size
+        results = list(compute_hashes(self.scan_images(cache), algorithm, hash_size, cache, executor))
+        self.log_signal.emit(f"⏳ 扫描完成：共 {len(self.paths)} 张图片")
+        self.prune_cache(cache)
+        # 第一层：内容完全相同（文件大小取自扫描结果）
+        exact = self.find_exact(self.paths, cache, executor)
+        # 第二层：图片哈希比对（完全重复的已归组，不再参与比对）
+        results = [result for result in results if result[0] not in exact]
+        if self.cascade:
+            similar = self.find_similar_cascade(results, cache, executor)
+        elif self.batch_mode:
+            similar = self.find_similar_batch(results)
+        else:
+            similar = self.find_similar(results)
 
+        # 并查集合并为重复组，按规则选出每组保留的图片
+        groups = build_duplicate_groups(self.paths, list(exact.items()) + similar, exact, self.keeper_rule)
+        self.log_groups(groups)
+        if groups:
+            self.save_report(groups)
+        # 删除作为单独一步批量进行，不与哈希计算的读盘交替
+        deleted = delete_duplicates(groups) if self.is_delete_dup else 0
+        return groups, deleted
+
+    def find_duplicates(self):
+        cache = self.open_cache()
+        executor = self.open_pool()
+        try:
+            groups, deleted = self.dedup_folder(cache, executor)
+        finally:
+            self.close_pool(executor)
+            self.close_cache(cache)
         # 总共满足的图片个数
-        conform_count = 0
-        # 删除个数
-        del_count = 0
-        # 重复或相似个数
-        dup_count = 0
-        for root, _, files in os.walk(self.folder_path):
-            for file in files:
-                if file.lower().endswith(('.png', '.jpg', '.jpeg')):
-                    conform_count = conform_count + 1
-                    path = os.path.join(root, file)
-                    try:
-                        # 第一层：MD5快速比对
-                        file_md5 = get_file_md5(path)
-                        if file_md5 in md5_dict:
-                            dup_count = dup_count + 1
-                            # print(f'完全重复文件: {path} <=> {md5_dict[file_md5]}')
-                            self.log_signal.emit(f'完全重复文件: {path} <=> {md5_dict[file_md5]}')
-                            if self.is_delete_dup:
-                                del_count = del_count + 1
-                                del_file(path)
-                            continue
-
-                        # 第二层：感知哈希比对
-                        img_phash = get_image_phash(path)
-                        for existing_phash in phash_dict:
-                            if img_phash - existing_phash < 5:  # 汉明距离阈值
-                                dup_count = dup_count + 1
-                                # print(f'相似图片: {path} ≈ {phash_dict[existing_phash]}')
-                                self.log_signal.emit(f'相似图片: {path} ≈ {phash_dict[existing_phash]}')
-                                if self.is_delete_dup:
-                                    del_count = del_count + 1
-                                    del_file(path)
-                                break
-                        else:
-                            phash_dict[img_phash] = path
-                        md5_dict[file_md5] = path
-                    except Exception as e:
-                        print(f'处理失败 {path}: {str(e)}')
-                        self.finish_signal.emit(False, f"去重异常：{str(e)}")
-        if self.is_delete_dup and dup_count > 0:
-            self.finish_signal.emit(True,
-                               f"去重完成！满足条件的图片共 {conform_count}张， 共检测到 {dup_count + 1} 张重复图片，已删除 {dup_count} 张，保留1张")
-        elif dup_count > 0:
+        self.emit_summary(len(self.paths), groups, deleted)
+
+    def emit_summary(self, conform_count, groups, deleted=0):
+        """发送去重结果汇总"""
+        dup_count = sum(len(group["members"]) - 1 for group in groups)
+        errors = f"，{self.error_count} 张图片处理失败（见日志）" if self.error_count else ""
+        if not groups:
+            self.finish_signal.emit(True, f"去重完成！满足条件的图片共 {conform_count}张， 未检测到重复图片{errors}")
+        elif self.is_delete_dup:
             self.finish_signal.emit(True,
-                               f"去重完成！满足条件的图片共 {conform_count}张，共检测到 {dup_count + 1} 张重复图片（未删除）")
+                               f"去重完成！满足条件的图片共 {conform_count}张，共 {len(groups)} 组重复图片，"
+                               f"每组保留1张，多余 {dup_count} 张，已删除 {deleted} 张{errors}")
         else:
-            self.finish_signal.emit(True, f"去重完成！满足条件的图片共 {conform_count}张， 未检测到重复图片")
+            self.finish_signal.emit(True,
+                               f"去重完成！满足条件的图片共 {conform_count}张，共 {len(groups)} 组重复图片，"
+                               f"每组保留1张，多余 {dup_count} 张（未删除）{errors}")
 
     def run(self):
         try:
             # 模拟去重流程
-            self.log_signal.emit("🔍 正在检测文件夹内的png、jpg、jpeg重复图片")
+            self.log_signal.emit(f"🔍 正在检测文件夹内的{'、'.join(ext.lstrip('.') for ext in self.extensions)}重复图片")
+            self.log_signal.emit(f"⚙️ 相似判定：{self.algorithm} 尺寸 {self.hash_size}，阈值 {self.threshold}"
+                                 f"{'，dHash 级联初筛' if self.cascade else ''}，保留规则：{self.keeper_rule}")
             self.find_duplicates()
         except Exception as e:
             self.finish_signal.emit(False, f"去重异常：{str(e)}")
 
+#监视文件夹线程
+class ImageWatchThread(ImageDedupThread):
+    """
+    监视文件夹线程：首轮与普通去重相同（按保留规则选出保留的图片、写报告、批量删除），并用结果建立去重索引，
+    之后每隔 interval 秒扫描一次，只对新增或修改过的图片计算哈希并与常驻内存的索引比对（已有的保留，新增的重复图片被标记）
+    """
+
+    def __init__(self, folder_path, is_delete_dup, interval=None, **options):
+        super().__init__(folder_path, is_delete_dup, **options)
+        from duplicates_photo import WATCH_INTERVAL
+        self.interval = interval or WATCH_INTERVAL
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        """请求停止监视（当前一轮处理完后结束）"""
+        self.cancel_event.set()
+
+    def watch_round(self, index, cache):
+        """扫描一轮：与上一轮比较，只处理新增或修改过的图片，返回 (重复个数, 删除个数)"""
+        from duplicates_photo import scan_files, del_file, POOL_MIN_FILES
+        started = time.perf_counter()
+        entries = list(scan_files(self.folder_path, self.extensions, self.include, self.exclude,
+                                  self.min_size, self.max_size))
+        changed, removed = index.diff(entries)
+        if not changed:
+            return 0, 0
+        executor = self.open_pool() if len(changed) >= POOL_MIN_FILES else None
+        try:
+            results = index.update(changed, executor)
+        finally:
+            self.close_pool(executor)
+
+        duplicates = []
+        for path, kind, other, error in results:
+            if kind == "exact":
+                self.log_signal.emit(f'完全重复文件: {path} <=> {other}')
+                duplicates.append(path)
+            elif kind == "similar":
+                self.log_signal.emit(f'相似图片: {path} ≈ {other}')
+                duplicates.append(path)
+            elif error is not None:
+                self.report_error(path, error)
+        # 本轮比对完成后再统一删除
+        deleted = sum(1 for path in duplicates if del_file(path)) if self.is_delete_dup else 0
+        cache.flush()
+        self.log_signal.emit(f"⏳ 新增或修改 {len(changed)} 张，移除 {len(removed)} 张，其中重复 {len(duplicates)} 张，"
+                             f"耗时 {(time.perf_counter() - started) * 1000:.0f} 毫秒（索引共 {len(index)} 张）")
+        return len(duplicates), deleted
+
+    def seed_index(self, index, cache):
+        """首轮：整体去重后把保留的图片（及无重复的图片）加入索引，返回 (重复个数, 删除个数)"""
+        executor = self.open_pool()
+        try:
+            groups, deleted = self.dedup_folder(cache, executor)
+            duplicates = {member["path"] for group in groups for member in group["members"]
+                          if member["role"] == "duplicate"}
+            # 已删除的重复图片不再记入索引，未删除的记为已处理但不参与比对
+            files = {path: (self.sizes[path], self.mtimes[path]) for path in self.paths
+                     if path not in duplicates or os.path.exists(path)}
+            index.seed(files, [path for path in self.paths if path not in duplicates], executor)
+        finally:
+            self.close_pool(executor)
+        cache.flush()
+        self.log_signal.emit(f"⏳ 首轮去重完成：{len(groups)} 组重复图片，索引共 {len(index)} 张")
+        return len(duplicates), deleted
+
+    def run(self):
+        try:
+            from duplicates_photo import DedupIndex
+            self.log_signal.emit(f"👀 开始监视文件夹：{self.folder_path}（每 {self.interval} 秒检查一次）")
+            self.log_signal.emit(f"⚙️ 相似判定：{self.algorithm} 尺寸 {self.hash_size}，阈值 {self.threshold}")
+            cache = self.open_cache()
+            index = DedupIndex(self.algorithm, self.hash_size, self.threshold, cache)
+            dup_count = 0
+            del_count = 0
+            try:
+                # 首轮整体去重，保留的图片建立索引，之后每轮只处理变化的部分
+                found, deleted = self.seed_index(index, cache)
+                while True:
+                    dup_count = dup_count + found
+                    del_count = del_count + deleted
+                    if self.cancel_event.wait(self.interval):
+                        break
+                    found, deleted = self.watch_round(index, cache)
+            finally:
+                self.close_cache(cache)
+            errors = f"，{self.error_count} 张图片处理失败（见日志）" if self.error_count else ""
+            if self.is_delete_dup:
+                self.finish_signal.emit(True, f"已停止监视，共发现 {dup_count} 张重复图片，已删除 {del_count} 张{errors}")
+            else:
+                self.finish_signal.emit(True, f"已停止监视，共发现 {dup_count} 张重复图片（未删除）{errors}")
+        except Exception as e:
+            self.finish_signal.emit(False, f"去重异常：{str(e)}")
+
 #文件大小线程
 class FileSizeThread(QThread):
     """文件大小统计线程"""
     log_signal = pyqtSignal(str)
+    log_batch_signal = pyqtSignal(list)  # 统计过程中攒批输出的日志行
+    result_signal = pyqtSignal(object)  # file_size.SizeResult
     finish_signal = pyqtSignal(bool, str)
 
-    def __init__(self, path,user_size):
+    def __init__(self, path, user_size, use_index=False, allocated=False, dedup_hardlinks=False,
+                 one_filesystem=False):
         super().__init__()
         self.path = path
         self.user_size = user_size  # 接收用户输入的大小阈值
+        self.use_index = use_index  # 是否使用持久化的大小索引
+        self.allocated = allocated  # 按占用空间（st_blocks）而不是文件大小统计
+        self.dedup_hardlinks = dedup_hardlinks  # 同一文件的多个硬链接只统计一次
+        self.one_filesystem = one_filesystem  # 不进入其它文件系统
 
     def run(self):
         try:
-            from file_size import calculate_path_size
+            from file_size import calculate_path_size, LineBatcher
 
             # 检查路径是否存在
             if not os.path.exists(self.path):
@@ -1478,15 +2771,50 @@ class FileSizeThread(QThread):
                 return
 
             self.log_signal.emit(f"程序处理中，请稍后...")
-            result = calculate_path_size(self.path, True, self.user_size)
+            # 引擎输出经 LineBatcher 攒批，每 100ms 或 500 行才发一次信号
+            batcher = LineBatcher(self.log_batch_signal.emit)
+            try:
+                result = calculate_path_size(self.path, False, self.user_size, use_index=self.use_index,
+                                             log=batcher.add, allocated=self.allocated,
+                                             dedup_hardlinks=self.dedup_hardlinks,
+                                             one_filesystem=self.one_filesystem)
+            finally:
+                batcher.flush()
+            self.result_signal.emit(result)
 
             if os.path.isfile(self.path):
                 self.finish_signal.emit(True, f"文件 {os.path.basename(self.path)} 大小：{result}")
             else:
-                self.finish_signal.emit(True, f"文件夹 {self.path} 总大小：{result}")
+                self.finish_signal.emit(True, f"文件夹 {self.path} 总大小：{result}（{result.file_count} 个文件）")
         except Exception as e:
             self.finish_signal.emit(False, f"统计异常：{str(e)}")
 
+class SizeTreeItem(QTreeWidgetItem):
+    """大小树的一行：按 UserRole 中的数值排序，而不是按 "1.50 GB" 这样的显示文本"""
+
+    def __lt__(self, other):
+        column = self.treeWidget().sortColumn() if self.treeWidget() else 0
+        mine = self.data(column, Qt.UserRole)
+        theirs = other.data(column, Qt.UserRole)
+        if mine is None or theirs is None:
+            return super().__lt__(other)
+        return mine < theirs
+
+
+class SizeTableItem(QTableWidgetItem):
+    """结果表中的大小单元格：显示带单位的大小，按字节数排序"""
+
+    def __init__(self, text, size):
+        super().__init__(text)
+        self.setData(Qt.UserRole, size)
+
+    def __lt__(self, other):
+        theirs = other.data(Qt.UserRole)
+        if theirs is None:
+            return super().__lt__(other)
+        return self.data(Qt.UserRole) < theirs
+
+
 #闹钟线程
 class AlarmThread(QThread):
     """闹钟线程"""
@@ -1767,6 +3095,8 @@ class MainWindow(QMainWindow):
 
 # ====================== 程序入口 ======================
 if __name__ == "__main__":
+    # 打包为exe后，分段并行提取的子进程需要此调用才能正常启动
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
     app.setFont(QFont("微软雅黑", 10))
     window = MainWindow()